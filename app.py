@@ -1,46 +1,375 @@
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import joblib
 import numpy as np
-import pandas as pd
 import os
+import csv
+import io
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load model and preprocessor at startup
-model = None
-scaler = None
+# Model bundle written by train_model.py, opened at startup
+bundle = None
 feature_names = None
 grade_mapping = None
+# Bundle checksum of the loaded model; part of every cache key
+model_version = None
+
+# Single model file: booster, scaler statistics, feature names and grade mapping
+MODEL_BUNDLE_PATH = os.environ.get('MODEL_BUNDLE_PATH', 'grade_model.bundle')
+# 'xgboost' serves the booster from the bundle; 'compiled' serves its flattened
+# tree arrays with NumPy only, without importing xgboost
+GRADE_ENGINE = os.environ.get('GRADE_ENGINE', 'xgboost').lower()
+# When the model itself is loaded: 'eager' before serving, 'background' in a
+# thread right after startup, 'lazy' on the first prediction. The header is
+# always read (and checked) at startup.
+MODEL_PRELOAD = os.environ.get('MODEL_PRELOAD', 'background').lower()
+
+# Request fields in model feature order:
+# Previous_Semester_GPA, No_of_Backlogs, Cumulative_GPA, T1_Marks, T2_Marks, T3_Marks,
+# Attendance_Percentage, TA_Marks, Adherence_to_Deadlines
+FEATURE_FIELDS = [
+    ('previousSemesterGPA', float),
+    ('numberOfBacklogs', int),
+    ('cumulativeGPA', float),
+    ('t1Marks', int),
+    ('t2Marks', int),
+    ('t3Marks', int),
+    ('attendancePercentage', int),
+    ('taMarks', int),
+    ('adherenceToDeadlines', int)
+]
+MAX_BATCH_SIZE = 5000
+# Largest what-if grid /predict/sweep scores in one request
+MAX_SWEEP_POINTS = 10000
+
+# Optional micro-batching of concurrent /predict calls: a request waits at most
+# PREDICT_MAX_WAIT_MS for others to share its predict_proba call, and only while
+# other requests are actually queued
+PREDICT_BATCHING = os.environ.get('PREDICT_BATCHING', '').lower() in ('1', 'true', 'yes')
+PREDICT_MAX_BATCH = int(os.environ.get('PREDICT_MAX_BATCH', '64'))
+PREDICT_MAX_WAIT_MS = float(os.environ.get('PREDICT_MAX_WAIT_MS', '2'))
+# Attendance database written by the face recognition backend (backend/attendance_store.py).
+# Students sent with a rollNo (and optional courseId) but no attendancePercentage
+# get it filled in from the running per-course counters there.
+ATTENDANCE_DB_PATH = os.environ.get(
+    'ATTENDANCE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'attendance.db'))
+# Cache of class probabilities per feature vector; 0 entries disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '10000'))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '600'))
+
+class PredictionCache:
+    """Bounded LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+
+class MicroBatcher:
+    """Runs concurrent single-row predictions through predict_fn as one matrix
+
+    A background thread takes the oldest queued request plus whatever else is
+    already queued. A request that arrives alone is dispatched at once, so idle
+    latency is unchanged; when several are queued the thread keeps collecting
+    for up to max_wait_ms or until max_batch rows, then fans the rows of the
+    result back to the waiting callers.
+    """
+
+    def __init__(self, predict_fn, max_batch=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._requests = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+        self._max_queue_depth = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='predict-batcher', daemon=True)
+                self._thread.start()
+
+    def submit(self, features):
+        """Predict one feature row; blocks until its batch has run"""
+        self._ensure_started()
+        item = {'features': features, 'done': threading.Event()}
+        self._queue.put(item)
+        with self._lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        item['done'].wait()
+        if 'error' in item:
+            raise item['error']
+        return item['result']
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            # Alone: go now. Part of a burst: give stragglers until the deadline.
+            remaining = deadline - time.perf_counter()
+            if len(batch) == 1 or remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.predict_fn(np.array([item['features'] for item in batch], dtype=np.float64))
+                for item, result in zip(batch, results):
+                    item['result'] = result
+            except Exception as e:
+                for item in batch:
+                    item['error'] = e
+            with self._lock:
+                self._batches += 1
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            for item in batch:
+                item['done'].set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "max_batch_size": self._max_batch_seen,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth
+            }
+
+def load_model_components(preload=None):
+    """Open the model bundle; fails fast (no training at startup) if it is missing or corrupt"""
+    global bundle, feature_names, grade_mapping, model_version
+    from model_bundle import ModelBundle
 
-def load_model_components():
-    global model, scaler, feature_names, grade_mapping
-    
     try:
-        # Check if model files exist, if not train the model
-        if not all(os.path.exists(f) for f in ['grade_prediction_model.pkl', 'scaler.pkl', 'feature_names.pkl', 'grade_mapping.pkl']):
-            print("Model files not found. Training model...")
-            from train_model import train_and_save_model
-            train_and_save_model()
-        
-        # Load the trained model and components
-        model = joblib.load('grade_prediction_model.pkl')
-        scaler = joblib.load('scaler.pkl')
-        feature_names = joblib.load('feature_names.pkl')
-        grade_mapping = joblib.load('grade_mapping.pkl')
-        
-        print("Model loaded successfully!")
+        start = time.perf_counter()
+        opened = ModelBundle(MODEL_BUNDLE_PATH, GRADE_ENGINE)
+        preload = preload or MODEL_PRELOAD
+        if preload == 'eager':
+            opened.load()
+
+        bundle = opened
+        feature_names = opened.feature_names
+        grade_mapping = opened.grade_mapping
+        model_version = opened.version
+        # Predictions cached for the previous model are no longer valid
+        prediction_cache.clear()
+
+        if preload == 'background':
+            threading.Thread(target=opened.load, name='model-preload', daemon=True).start()
+
+        print(f"Model bundle opened in {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"(engine: {GRADE_ENGINE}, version {model_version}, preload: {preload})")
         print(f"Expected features: {feature_names}")
-        
+
     except Exception as e:
         print(f"Error loading model: {str(e)}")
+        print("Train a model with `python train_model.py` (or convert existing .pkl files with "
+              "`python train_model.py --from-pickles`) before starting the API")
         raise e
 
+def predict_proba_matrix(features):
+    """Class probabilities for an (n, 9) matrix of raw features"""
+    return bundle.predict_proba(features)
+
+predict_batcher = MicroBatcher(predict_proba_matrix, PREDICT_MAX_BATCH, PREDICT_MAX_WAIT_MS) if PREDICT_BATCHING else None
+
+def cache_key(features):
+    """Canonical feature tuple (GPAs to 2 decimals) tied to the loaded model"""
+    return (model_version,) + tuple(round(v, 2) if isinstance(v, float) else v for v in features)
+
+attendance_db = threading.local()
+
+def recorded_attendance(roll_no, course_id=None):
+    """Attendance from the backend's running counters, or None if nothing is recorded
+
+    One primary-key lookup per course the student attends; the history itself
+    is never scanned. Over several courses it is total present / total held.
+    """
+    if not os.path.exists(ATTENDANCE_DB_PATH):
+        return None
+    conn = getattr(attendance_db, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{ATTENDANCE_DB_PATH}?mode=ro", uri=True, timeout=5)
+        attendance_db.conn = conn
+
+    query = ("SELECT SUM(t.sessions_present), SUM(c.sessions_held), MAX(t.last_seen) "
+             "FROM attendance_totals t JOIN course_totals c USING (course_id) WHERE t.roll_no = ?")
+    params = [str(roll_no)]
+    if course_id is not None:
+        query += " AND t.course_id = ?"
+        params.append(str(course_id))
+    try:
+        present, held, last_seen = conn.execute(query, params).fetchone()
+    except sqlite3.Error as e:
+        print(f"Attendance lookup failed: {str(e)}")
+        return None
+    if not held:
+        return None
+    return {
+        "percentage": round(100 * present / held, 2),
+        "sessions_held": held,
+        "sessions_present": present,
+        "last_seen": last_seen
+    }
+
+def fill_attendance(data):
+    """Return (data, attendance) with attendancePercentage filled from the recorded counters
+
+    Only when the client did not send one and did send a rollNo (or studentId).
+    """
+    roll_no = data.get('rollNo') or data.get('studentId')
+    if data.get('attendancePercentage') not in (None, '') or not roll_no:
+        return data, None
+    attendance = recorded_attendance(roll_no, data.get('courseId'))
+    if attendance is None:
+        return data, None
+    return dict(data, attendancePercentage=int(round(attendance['percentage']))), attendance
+
+def parse_features(data):
+    """Build the feature list for one student; raises KeyError/ValueError/TypeError on bad input"""
+    return [convert(data[field]) for field, convert in FEATURE_FIELDS]
+
+def format_prediction(features, prediction_proba):
+    """Response body for one student from its features and class probabilities"""
+    prediction = int(np.argmax(prediction_proba))
+    predicted_grade = grade_mapping[prediction]
+    confidence = float(max(prediction_proba) * 100)
+
+    # Calculate total score for additional info
+    total_score = sum(features[3:7])  # T1 + T2 + T3 + TA
+
+    return {
+        "predicted_grade": predicted_grade,
+        "confidence": round(confidence, 2),
+        "total_score": total_score,
+        "grade_probabilities": {
+            grade_mapping[i]: round(float(prob) * 100, 2)
+            for i, prob in enumerate(prediction_proba)
+        }
+    }
+
+def read_batch_rows():
+    """Students of a batch request: a JSON array (or {"students": [...]}) or a CSV body with a header row"""
+    if request.mimetype in ('text/csv', 'application/csv'):
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('students')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of students or a CSV body")
+    return data
+
+def sweep_axis(spec):
+    """(field index, ascending values) for one /predict/sweep axis
+
+    spec is {"field", "min", "max", "step"} (max inclusive; step defaults to 1
+    for integer fields and 0.1 for GPAs) or {"field", "values": [...]}.
+    """
+    fields = [field for field, _ in FEATURE_FIELDS]
+    if not isinstance(spec, dict) or spec.get('field') not in fields:
+        raise ValueError(f"Each sweep needs a 'field', one of {fields}")
+    index = fields.index(spec['field'])
+    convert = FEATURE_FIELDS[index][1]
+
+    if 'values' in spec:
+        values = sorted({convert(v) for v in spec['values']})
+    else:
+        low, high = float(spec['min']), float(spec['max'])
+        step = float(spec.get('step', 1 if convert is int else 0.1))
+        if step <= 0 or high < low:
+            raise ValueError(f"Invalid range for {spec['field']}")
+        if (high - low) / step >= MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep too large (max {MAX_SWEEP_POINTS} points)")
+        grid = np.arange(low, high + step / 2, step)
+        values = sorted({convert(round(v, 2)) for v in grid.tolist()})
+    if not values:
+        raise ValueError(f"No values to sweep for {spec['field']}")
+    return index, values
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "Grade prediction API is running"})
+    return jsonify({
+        "status": "healthy",
+        "message": "Grade prediction API is running",
+        "model_loaded": bundle is not None and bundle.loaded
+    })
 
 @app.route('/predict', methods=['POST'])
 def predict_grade():
@@ -53,50 +382,28 @@ def predict_grade():
         
         print(f"Received data: {data}")
         
-        # Create feature array in the correct order
-        # Expected order: Previous_Semester_GPA, No_of_Backlogs, Cumulative_GPA, T1_Marks, T2_Marks, T3_Marks, Attendance_Percentage, TA_Marks, Adherence_to_Deadlines
-        features = [
-            float(data['previousSemesterGPA']),
-            int(data['numberOfBacklogs']),
-            float(data['cumulativeGPA']),
-            int(data['t1Marks']),
-            int(data['t2Marks']),
-            int(data['t3Marks']),
-            int(data['attendancePercentage']),
-            int(data['taMarks']),
-            int(data['adherenceToDeadlines'])
-        ]
+        # Create feature array in the correct order (see FEATURE_FIELDS),
+        # with attendance from the recorded sessions when the client has none
+        data, attendance = fill_attendance(data)
+        features = parse_features(data)
         
         print(f"Features array: {features}")
         
-        # Convert to numpy array and reshape
-        features_array = np.array(features).reshape(1, -1)
-        
-        # Scale features
-        features_scaled = scaler.transform(features_array)
+        # Scale and predict; the label is the argmax of the probabilities.
+        # With PREDICT_BATCHING the row shares one call with concurrent requests.
+        key = cache_key(features)
+        prediction_proba = prediction_cache.get(key)
+        if prediction_proba is None:
+            if predict_batcher is not None:
+                prediction_proba = predict_batcher.submit(features)
+            else:
+                prediction_proba = predict_proba_matrix(np.array(features).reshape(1, -1))[0]
+            prediction_cache.put(key, prediction_proba)
+        response = format_prediction(features, prediction_proba)
+        if attendance is not None:
+            response["attendance"] = attendance
         
-        # Make prediction
-        prediction = model.predict(features_scaled)[0]
-        prediction_proba = model.predict_proba(features_scaled)[0]
-        
-        # Get predicted grade
-        predicted_grade = grade_mapping[prediction]
-        confidence = float(max(prediction_proba) * 100)
-        
-        print(f"Prediction: {prediction} -> {predicted_grade} (confidence: {confidence:.2f}%)")
-        
-        # Calculate total score for additional info
-        total_score = sum(features[3:7])  # T1 + T2 + T3 + TA
-        
-        response = {
-            "predicted_grade": predicted_grade,
-            "confidence": round(confidence, 2),
-            "total_score": total_score,
-            "grade_probabilities": {
-                grade_mapping[i]: round(float(prob) * 100, 2) 
-                for i, prob in enumerate(prediction_proba)
-            }
-        }
+        print(f"Prediction: {response['predicted_grade']} (confidence: {response['confidence']:.2f}%)")
         
         return jsonify(response)
         
@@ -106,13 +413,161 @@ def predict_grade():
         print(f"Prediction error: {str(e)}")
         return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict grades for many students with one scale + predict_proba pass
+
+    Rows that fail validation get an "error" entry instead of failing the batch.
+    """
+    try:
+        try:
+            rows = read_batch_rows()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if not rows:
+            return jsonify({"error": "No data provided"}), 400
+        if len(rows) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} students)"}), 413
+
+        results = [None] * len(rows)
+        valid_rows, valid_features, attendances = [], [], {}
+        for i, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise TypeError("expected an object")
+                row, attendance = fill_attendance(row)
+                valid_features.append(parse_features(row))
+                valid_rows.append(i)
+                if attendance is not None:
+                    attendances[i] = attendance
+            except KeyError as e:
+                results[i] = {"index": i, "error": f"Missing required field: {str(e)}"}
+            except (ValueError, TypeError) as e:
+                results[i] = {"index": i, "error": f"Invalid value: {str(e)}"}
+
+        # Only rows missing from the cache go through the model
+        keys = [cache_key(features) for features in valid_features]
+        probas = [prediction_cache.get(key) for key in keys]
+        missing = [j for j, proba in enumerate(probas) if proba is None]
+        if missing:
+            computed = predict_proba_matrix(np.array([valid_features[j] for j in missing], dtype=np.float64))
+            for j, proba in zip(missing, computed):
+                probas[j] = proba
+                prediction_cache.put(keys[j], proba)
+
+        for i, features, proba in zip(valid_rows, valid_features, probas):
+            results[i] = dict(format_prediction(features, proba), index=i)
+            if i in attendances:
+                results[i]["attendance"] = attendances[i]
+
+        # Echo an identifier back when the client sent one
+        for row, result in zip(rows, results):
+            if isinstance(row, dict) and row.get('studentId') is not None:
+                result['studentId'] = row['studentId']
+
+        print(f"Batch prediction: {len(valid_rows)} predicted, {len(rows) - len(valid_rows)} rejected")
+
+        return jsonify({
+            "results": results,
+            "predicted": len(valid_rows),
+            "errors": len(rows) - len(valid_rows)
+        })
+
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """What-if grid: vary one or two features of a base student and score every combination at once
+
+    Body: {"student": {...same fields as /predict...},
+           "sweep": [{"field": "t3Marks", "min": 0, "max": 35}, ...]}
+    Returns the grade probabilities for every grid point and, per grade, the
+    smallest value of the (last) swept field at which that grade or a better one
+    is predicted.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('student'), dict):
+            return jsonify({"error": "Expected {\"student\": {...}, \"sweep\": [...]}"}), 400
+        sweeps = data.get('sweep')
+        if isinstance(sweeps, dict):
+            sweeps = [sweeps]
+        if not isinstance(sweeps, list) or not 1 <= len(sweeps) <= 2:
+            return jsonify({"error": "Sweep one or two features"}), 400
+
+        try:
+            axes = [sweep_axis(spec) for spec in sweeps]
+            # Swept fields may be left out of the base student
+            base, _ = fill_attendance(data['student'])
+            base = dict({FEATURE_FIELDS[index][0]: values[0] for index, values in axes}, **base)
+            features = parse_features(base)
+        except KeyError as e:
+            return jsonify({"error": f"Missing required field: {str(e)}"}), 400
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": f"Invalid sweep: {str(e)}"}), 400
+
+        if len({index for index, _ in axes}) != len(axes):
+            return jsonify({"error": "Sweep each feature at most once"}), 400
+        shape = tuple(len(values) for _, values in axes)
+        if int(np.prod(shape)) > MAX_SWEEP_POINTS:
+            return jsonify({"error": f"Sweep too large (max {MAX_SWEEP_POINTS} points)"}), 413
+
+        # Every grid point as one row of a single matrix, first axis slowest
+        grid = np.tile(np.array(features, dtype=np.float64), (int(np.prod(shape)), 1))
+        mesh = np.meshgrid(*[np.array(values, dtype=np.float64) for _, values in axes], indexing='ij')
+        for (index, _), column in zip(axes, mesh):
+            grid[:, index] = column.ravel()
+
+        proba = np.asarray(predict_proba_matrix(grid)).reshape(shape + (-1,))
+        predicted = proba.argmax(axis=-1)
+        n_grades = proba.shape[-1]
+        grades = [grade_mapping[i] for i in range(n_grades)]
+
+        # Grade indices run best (A+ = 0) to worst, so "reaches grade g" is index <= g
+        reached = predicted[..., None] <= np.arange(n_grades)
+        first = reached.argmax(axis=-2)
+        any_reached = reached.any(axis=-2)
+        last_field, last_values = FEATURE_FIELDS[axes[-1][0]][0], axes[-1][1]
+        minimal_values = {}
+        for g, grade in enumerate(grades):
+            if len(axes) == 1:
+                minimal_values[grade] = {last_field: last_values[first[g]]} if any_reached[g] else None
+            else:
+                first_field, first_values = FEATURE_FIELDS[axes[0][0]][0], axes[0][1]
+                minimal_values[grade] = [
+                    {first_field: first_values[i], last_field: last_values[first[i, g]]}
+                    for i in range(shape[0]) if any_reached[i, g]]
+
+        print(f"Sweep prediction: {len(grid)} grid points over "
+              f"{', '.join(FEATURE_FIELDS[index][0] for index, _ in axes)}")
+
+        return jsonify({
+            "axes": [{"field": FEATURE_FIELDS[index][0], "values": values} for index, values in axes],
+            "grades": grades,
+            "probabilities": np.round(proba * 100, 2).tolist(),
+            "predicted_grades": np.array(grades, dtype=object)[predicted].tolist(),
+            "minimal_values": minimal_values
+        })
+
+    except Exception as e:
+        print(f"Sweep prediction error: {str(e)}")
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
 @app.route('/model-info', methods=['GET'])
 def model_info():
     try:
         return jsonify({
             "model_type": "XGBoost Classifier",
+            "engine": GRADE_ENGINE,
             "features": feature_names,
             "possible_grades": list(grade_mapping.values()),
+            "model_version": model_version,
+            "bundle": bundle.info(),
+            "batching": predict_batcher.stats() if predict_batcher else None,
+            "cache": prediction_cache.stats(),
             "status": "ready"
         })
     except Exception as e:
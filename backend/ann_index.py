@@ -0,0 +1,200 @@
+import os
+import shutil
+import uuid
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILES = {
+    'centroids': 'ann_centroids.npy',
+    'offsets': 'ann_list_offsets.npy',
+    'vectors': 'ann_vectors.npy',
+    'norms': 'ann_vector_norms.npy',
+    'labels': 'ann_labels.npy',
+}
+# Each save goes to its own ann_index.<build id> directory; this file names the current one
+INDEX_POINTER = 'ann_index.current'
+BUILD_PREFIX = 'ann_index.'
+ASSIGN_CHUNK = 65536
+# k-means only needs a sample to place the coarse centroids
+KMEANS_POINTS_PER_LIST = 32
+
+
+def squared_distances(X, C, C_norms=None):
+    """Squared Euclidean distances between rows of X and rows of C"""
+    if C_norms is None:
+        C_norms = (C ** 2).sum(axis=1)
+    d = (X ** 2).sum(axis=1)[:, None] - 2 * X @ C.T + C_norms[None, :]
+    return np.maximum(d, 0)
+
+
+def assign(X, centroids):
+    """Index of the nearest centroid for every row of X, computed in bounded chunks"""
+    norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(X), dtype=np.int64)
+    for start in range(0, len(X), ASSIGN_CHUNK):
+        chunk = np.asarray(X[start:start + ASSIGN_CHUNK], dtype=np.float32)
+        out[start:start + len(chunk)] = squared_distances(chunk, centroids, norms).argmin(axis=1)
+    return out
+
+
+def kmeans(X, n_clusters, iterations=10, seed=42):
+    """Plain Lloyd's k-means on a sample of X, good enough for a coarse quantizer"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(X), n_clusters * KMEANS_POINTS_PER_LIST)
+    X = np.asarray(X[np.sort(rng.choice(len(X), sample_size, replace=False))], dtype=np.float32)
+    centroids = X[rng.choice(len(X), n_clusters, replace=False)]
+    for _ in range(iterations):
+        assignment = assign(X, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=n_clusters)
+        sums = np.zeros((n_clusters, X.shape[1]), dtype=np.float64)
+        nonempty = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums[nonempty] = np.add.reduceat(X[order], starts, axis=0)
+        # Re-seed empty lists with random points so every list stays usable
+        empty = ~nonempty
+        sums[empty] = X[rng.choice(len(X), empty.sum())]
+        counts[empty] = 1
+        centroids = (sums / counts[:, None]).astype(np.float32)
+    return centroids
+
+
+def _current_build(directory):
+    """Name of the build directory INDEX_POINTER points at, or None"""
+    try:
+        with open(os.path.join(directory, INDEX_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _remove_builds(directory, keep=()):
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(BUILD_PREFIX) and name not in keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class IVFIndex:
+    """Inverted-file index over face encodings
+
+    A coarse k-means quantizer splits the encodings into n_lists cells, and the
+    vectors are stored contiguously grouped by cell. A query only scans the
+    n_probe cells whose centroids are nearest to it, so its cost grows with
+    roughly N * n_probe / n_lists instead of with the whole roster.
+    """
+
+    def __init__(self, centroids, offsets, vectors, norms, labels):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.norms = norms
+        self.labels = labels
+        self.centroid_norms = (np.asarray(centroids) ** 2).sum(axis=1)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, X, y, n_lists=None):
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y).astype(str)
+        if n_lists is None:
+            # Usual IVF rule of thumb: a few times sqrt(N) lists
+            n_lists = int(2 * np.sqrt(len(X)))
+        n_lists = max(1, min(n_lists, len(X)))
+
+        centroids = kmeans(X, n_lists) if n_lists > 1 else X.mean(axis=0, keepdims=True)
+        assignment = assign(X, centroids)
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        vectors = X[order]
+        logger.info(f"Built IVF index: {len(X)} vectors in {n_lists} lists")
+        return cls(centroids, offsets, vectors, (vectors ** 2).sum(axis=1), y[order])
+
+    def save(self, directory):
+        """Write the index into a new build directory, then point INDEX_POINTER at it
+
+        Replacing the pointer (temp file + rename) is the only step readers see,
+        so load() gets either the old build or the new one, never a mix of
+        files. The build it replaces is kept for readers that have just read the
+        old pointer; anything older is deleted.
+        """
+        previous = _current_build(directory)
+        build = f"{BUILD_PREFIX}{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(directory, build))
+        for key, file_name in INDEX_FILES.items():
+            np.save(os.path.join(directory, build, file_name), np.asarray(getattr(self, key)))
+
+        pointer = os.path.join(directory, INDEX_POINTER)
+        with open(f"{pointer}.tmp", 'w') as f:
+            f.write(build)
+        os.replace(f"{pointer}.tmp", pointer)
+        _remove_builds(directory, keep={build, previous})
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map the current saved index; returns None if it has not been built"""
+        build = _current_build(directory)
+        if build is None:
+            return None
+        paths = {key: os.path.join(directory, build, file_name) for key, file_name in INDEX_FILES.items()}
+        if not all(os.path.exists(path) for path in paths.values()):
+            logger.warning(f"ANN index build {build} is incomplete; ignoring it")
+            return None
+        arrays = {key: np.load(path, mmap_mode='r') for key, path in paths.items()}
+        return cls(np.asarray(arrays['centroids']), np.asarray(arrays['offsets']),
+                   arrays['vectors'], arrays['norms'], arrays['labels'])
+
+    @staticmethod
+    def remove(directory):
+        pointer = os.path.join(directory, INDEX_POINTER)
+        if os.path.exists(pointer):
+            os.remove(pointer)
+        _remove_builds(directory)
+        # Files written directly into the model directory by older versions
+        for file_name in INDEX_FILES.values():
+            path = os.path.join(directory, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def search(self, queries, k=5, n_probe=8):
+        """Return (distances, labels) of the k nearest stored encodings per query
+
+        Both arrays have shape (n_queries, k); missing neighbours (fewer than
+        k candidates in the probed lists) have distance inf and label ''.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.centroids.shape[1])
+        n_probe = min(n_probe, self.n_lists)
+        probe = np.argsort(squared_distances(queries, self.centroids, self.centroid_norms),
+                           axis=1)[:, :n_probe]
+
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), '', dtype=self.labels.dtype)
+        query_norms = (queries ** 2).sum(axis=1)
+        for q, lists in enumerate(probe):
+            # Each list is a contiguous slice, so no gather copy is needed
+            parts, rows = [], []
+            for l in lists:
+                start, end = self.offsets[l], self.offsets[l + 1]
+                if end > start:
+                    parts.append(self.norms[start:end] - 2 * (self.vectors[start:end] @ queries[q]))
+                    rows.append(np.arange(start, end))
+            if not parts:
+                continue
+            d = np.concatenate(parts) + query_norms[q]
+            rows = np.concatenate(rows)
+            top = np.argpartition(d, k)[:k] if len(d) > k else np.arange(len(d))
+            top = top[np.argsort(d[top])]
+            distances[q, :len(top)] = np.sqrt(np.maximum(d[top], 0))
+            labels[q, :len(top)] = self.labels[rows[top]]
+        return distances, labels
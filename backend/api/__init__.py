@@ -1,7 +1,9 @@
 from flask import Blueprint
-from .recognize import recognize_face
-from .save_attendance import save_attendance
+from .save_attendance import save_attendance, student_attendance, student_attendance_totals, course_attendance
 
+# Attendance routes, mounted by backend/app.py under /api next to its recognition endpoints
 api_blueprint = Blueprint('api', __name__)
-api_blueprint.route('/recognize', methods=['POST'])(recognize_face)
 api_blueprint.route('/save-attendance', methods=['POST'])(save_attendance)
+api_blueprint.route('/attendance/students/<roll_no>', methods=['GET'])(student_attendance)
+api_blueprint.route('/attendance/students/<roll_no>/totals', methods=['GET'])(student_attendance_totals)
+api_blueprint.route('/attendance/courses/<course_id>', methods=['GET'])(course_attendance)
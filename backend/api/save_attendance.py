@@ -1,20 +1,39 @@
 from flask import request, jsonify
-import csv
-import os
-from datetime import datetime
+
+from attendance_store import get_attendance_store
 
 def save_attendance():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     course_id = data.get('courseId')
     records = data.get('attendance', [])
 
-    filename = f'attendance_{course_id}_{datetime.now().strftime("%Y%m%d")}.csv'
-    filepath = os.path.join('attendance.csv')
+    if not course_id or not isinstance(records, list):
+        return jsonify({'status': 'error', 'message': 'courseId and an attendance list are required'}), 400
+
+    # One session per call, saved with all its records in one transaction; saving the
+    # same course and date again replaces that session
+    try:
+        session_id = get_attendance_store().append_session(course_id, records, data.get('date'))
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({'status': 'success', 'sessionId': session_id, 'records': len(records)})
+
+def student_attendance(roll_no):
+    """Attendance history of one student; ?courseId=&from=YYYY-MM-DD&to=YYYY-MM-DD&limit= narrow it"""
+    records = get_attendance_store().student_history(
+        roll_no, request.args.get('courseId'), request.args.get('from'), request.args.get('to'),
+        request.args.get('limit', type=int))
+    present = sum(1 for record in records if record['status'] == 'present')
+    return jsonify({'rollNo': roll_no, 'records': records, 'sessions': len(records), 'present': present})
 
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Name', 'Roll Number', 'Status', 'Confidence', 'Timestamp'])
-        for student in records:
-            writer.writerow([student['name'], student['rollNo'], student['status'], student['confidence'], student['timestamp']])
+def student_attendance_totals(roll_no):
+    """Running attendance counters of one student per course (?courseId= for one course)"""
+    totals = get_attendance_store().student_totals(roll_no, request.args.get('courseId'))
+    return jsonify({'rollNo': roll_no, 'courses': totals})
 
-    return jsonify({'status': 'success'})
+def course_attendance(course_id):
+    """Sessions of one course with their records; ?from=&to=&limit= narrow it"""
+    sessions = get_attendance_store().course_history(
+        course_id, request.args.get('from'), request.args.get('to'), request.args.get('limit', type=int))
+    return jsonify({'courseId': course_id, 'sessions': sessions})
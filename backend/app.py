@@ -1,13 +1,36 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import base64, numpy as np, cv2, joblib, os
+import base64, numpy as np, cv2, os
 from datetime import datetime
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import face_recognition
 from sklearn.svm import SVC
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 import logging
+from embedding_store import EmbeddingStore
+from migrate_dataset import has_legacy_folders, migrate as migrate_dataset
+from retrain_worker import RetrainWorker
+from recognition_engines import CentroidEngine, AnnEngine
+from ann_index import IVFIndex
+from face_detection import FaceDetector
+from face_tracking import FaceTracker, StreamSession
+from inference_pool import InferencePool, PoolSaturated
+from student_registry import get_student_registry
+from model_registry import FacePipeline, ARTIFACTS, get_model_registry
+from health_counters import HealthCounters
+from api import api_blueprint
+from image_upload import (read_image_request, read_burst_request, sample_video_frames, decode_image,
+                          decode_base64_image, decode_image_buffer)
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket transport is optional; the HTTP session endpoints always work
+    Sock = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,165 +38,465 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+# Attendance saving and history: /api/save-attendance, /api/attendance/...
+app.register_blueprint(api_blueprint, url_prefix='/api')
 
 # Configuration
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 MODEL_DIR = os.path.join(BASE_DIR, 'models')
 DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
-STUDENTS_DB_PATH = os.path.join(BASE_DIR, 'students.json')
+# Frames collected before a registration is complete
+REQUIRED_SAMPLES = 50
+# Rewritten whenever a new model is published, so pool workers know to reload
+MODEL_VERSION_PATH = os.path.join(MODEL_DIR, 'model_version')
+# Quiet period after the last completed registration before a background retrain starts
+RETRAIN_DEBOUNCE_SECONDS = float(os.environ.get('RETRAIN_DEBOUNCE_SECONDS', '5'))
+# 'svm' (scaler -> PCA -> SVC, refit on every enrollment), 'centroid'
+# (open-set nearest centroid, new students are added without a refit) or 'ann'
+# (k-NN over every stored encoding through an IVF index kept in models/)
+RECOGNITION_ENGINE = os.environ.get('RECOGNITION_ENGINE', 'svm').lower()
+# Optional fixed distance threshold for the centroid engine; calibrated from data if unset
+CENTROID_DISTANCE_THRESHOLD = os.environ.get('CENTROID_DISTANCE_THRESHOLD')
+ANN_TOP_K = int(os.environ.get('ANN_TOP_K', '5'))
+ANN_N_PROBE = int(os.environ.get('ANN_N_PROBE', '8'))
+# Face detection backend ('hog', 'cnn', 'haar' or 'dnn') and the factor frames are
+# downscaled by before detection; both can be overridden per request
+FACE_DETECTOR = os.environ.get('FACE_DETECTOR', 'hog').lower()
+DETECTION_SCALE = float(os.environ.get('DETECTION_SCALE', '1.0'))
+FACE_DETECTION_UPSAMPLE = int(os.environ.get('FACE_DETECTION_UPSAMPLE', '1'))
+# Directory holding deploy.prototxt and the res10 caffemodel for the 'dnn' detector
+FACE_DNN_MODEL_DIR = os.environ.get('FACE_DNN_MODEL_DIR', os.path.join(BASE_DIR, 'models'))
+# Streaming sessions: full detection every STREAM_KEYFRAME_INTERVAL frames, optical-flow
+# tracking in between; sessions idle for STREAM_SESSION_TTL seconds are dropped
+STREAM_KEYFRAME_INTERVAL = int(os.environ.get('STREAM_KEYFRAME_INTERVAL', '10'))
+STREAM_SESSION_TTL = float(os.environ.get('STREAM_SESSION_TTL', '300'))
+# 'dev' runs Flask's debug server; 'pool' runs detection, encoding and classification
+# in INFERENCE_WORKERS processes and answers 503 once INFERENCE_QUEUE_SIZE requests wait
+SERVING_MODE = os.environ.get('SERVING_MODE', 'dev').lower()
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', str(os.cpu_count() or 1)))
+INFERENCE_QUEUE_SIZE = int(os.environ.get('INFERENCE_QUEUE_SIZE', '8'))
+# Burst enrollment: most frames accepted per request, and encoder threads when not in pool mode
+BURST_MAX_FRAMES = int(os.environ.get('BURST_MAX_FRAMES', '120'))
+BURST_THREADS = int(os.environ.get('BURST_THREADS', str(os.cpu_count() or 1)))
+# How often the /api/health counters are recounted from disk (0 disables the background recount)
+HEALTH_RECONCILE_SECONDS = float(os.environ.get('HEALTH_RECONCILE_SECONDS', '300'))
 
 # Ensure directories exist
 os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(DATASET_DIR, exist_ok=True)
 
-# Global variables for models
-model = None
-scaler = None
-pca = None
-target_names = None
+# All face encodings, as one append-only float32 matrix plus label index
+embedding_store = EmbeddingStore(DATASET_DIR)
+if not embedding_store.total and has_legacy_folders(DATASET_DIR):
+    # Otherwise the next retrain would drop every student enrolled before the store existed
+    logger.info("Embedding store is empty but legacy dataset/<rollNo>/ folders exist; importing them")
+    migrate_dataset(DATASET_DIR, store=embedding_store)
 
-def load_models():
-    """Load trained models"""
-    global model, scaler, pca, target_names
-    try:
-        if os.path.exists(os.path.join(MODEL_DIR, 'svm_face_model.pkl')):
-            model = joblib.load(os.path.join(MODEL_DIR, 'svm_face_model.pkl'))
-            logger.info("SVM model loaded successfully")
-        
-        if os.path.exists(os.path.join(MODEL_DIR, 'scaler.pkl')):
-            scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
-            logger.info("Scaler loaded successfully")
-        else:
-            # Create default scaler
-            scaler = StandardScaler()
-            logger.info("Created new scaler")
-        
-        if os.path.exists(os.path.join(MODEL_DIR, 'pca.pkl')):
-            pca = joblib.load(os.path.join(MODEL_DIR, 'pca.pkl'))
-            logger.info("PCA loaded successfully")
-        else:
-            # Create default PCA
-            pca = PCA(n_components=50)
-            logger.info("Created new PCA")
-        
-        if os.path.exists(os.path.join(MODEL_DIR, 'target_names.pkl')):
-            target_names = joblib.load(os.path.join(MODEL_DIR, 'target_names.pkl'))
-            logger.info("Target names loaded successfully")
-        
-    except Exception as e:
-        logger.error(f"Error loading models: {e}")
-        # Initialize default models
-        scaler = StandardScaler()
-        pca = PCA(n_components=50)
+# The scaler -> PCA -> SVM pipeline, loaded on first use
+model_registry = get_model_registry()
 
-def load_students_db():
-    """Load students database from JSON file"""
-    try:
-        if os.path.exists(STUDENTS_DB_PATH):
-            with open(STUDENTS_DB_PATH, 'r') as f:
-                return json.load(f)
-        return []
-    except Exception as e:
-        logger.error(f"Error loading students database: {e}")
-        return []
+centroid_engine = CentroidEngine(
+    threshold=float(CENTROID_DISTANCE_THRESHOLD) if CENTROID_DISTANCE_THRESHOLD else None)
+ann_engine = AnnEngine(k=ANN_TOP_K, n_probe=ANN_N_PROBE)
 
-def save_students_db(students_db):
-    """Save students database to JSON file"""
-    try:
-        atomic_write_json(STUDENTS_DB_PATH, students_db)
+# Engines that recognize straight from stored encodings (no SVM pipeline)
+open_set_engines = {'centroid': centroid_engine, 'ann': ann_engine}
 
-    except Exception as e:
-        logger.error(f"Error saving students database: {e}")
+def active_engine():
+    """The configured open-set engine, or None when the SVM pipeline is in use"""
+    return open_set_engines.get(RECOGNITION_ENGINE)
+
+# In-memory roster index (rollNo -> student), rebuilt when the registry's roster version changes
+students_index = {}
+students_index_version = None
+students_index_lock = threading.Lock()
+
+# Set by start_inference_pool() when SERVING_MODE=pool
+inference_pool = None
+# Encodes burst frames in parallel otherwise; threads start on first use, so never before a fork
+burst_executor = ThreadPoolExecutor(max_workers=BURST_THREADS, thread_name_prefix='burst-encode')
+# Model version this process last loaded (see MODEL_VERSION_PATH)
+loaded_model_version = None
+
+def refresh_students_index():
+    """Rebuild the roster index from the registry"""
+    global students_index, students_index_version
+    registry = get_student_registry()
+    with students_index_lock:
+        version = registry.roster_version()
+        # Swap in a new dict so concurrent readers never see a partial index
+        students_index = {s['rollNo']: s for s in registry.students()}
+        students_index_version = version
+
+def get_students_index():
+    """Return the rollNo -> student index, reloading it only if the registered roster changed"""
+    if get_student_registry().roster_version() != students_index_version:
+        refresh_students_index()
+    return students_index
+
+class StageTimer:
+    """Collects per-stage wall-clock timings (in ms) for one request"""
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def report(self):
+        return dict(self.timings, total_ms=round((time.perf_counter() - self._start) * 1000, 2))
+
+# Detectors by (backend, scale), so per-camera overrides are only built once.
+# Client scales are snapped to DETECTION_SCALE_STEP, which bounds the cache
+# at a few backends x 1 / DETECTION_SCALE_STEP scales.
+detectors = {}
+DETECTION_SCALE_STEP = 0.05
+
+def get_detector(backend=None, scale=None):
+    """Detector for the requested backend/scale, defaulting to FACE_DETECTOR/DETECTION_SCALE
+
+    Raises ValueError (or FileNotFoundError for a dnn detector without its model
+    files) when the requested configuration is invalid.
+    """
+    if scale:
+        scale = float(scale)
+        if not 0 < scale <= 1:
+            raise ValueError("Detection scale must be in (0, 1]")
+        scale = round(max(1, round(scale / DETECTION_SCALE_STEP)) * DETECTION_SCALE_STEP, 2)
+    key = (str(backend or FACE_DETECTOR).lower(), scale or DETECTION_SCALE)
+    detector = detectors.get(key)
+    if detector is None:
+        detector = FaceDetector(key[0], key[1], upsample=FACE_DETECTION_UPSAMPLE,
+                                dnn_model_dir=FACE_DNN_MODEL_DIR)
+        detectors[key] = detector
+    return detector
 
-def decode_base64_image(image_data):
-    """Decode base64 image data"""
+def detect_and_encode(frame, detector, timer):
+    """Detect faces in a BGR frame and encode them at full resolution"""
+    with timer.stage('detect'):
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        face_locations = detector.detect(rgb_frame)
+    with timer.stage('encode'):
+        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+    return face_locations, face_encodings
+
+def recognizer_ready(pipeline=None):
+    """Whether the configured recognition engine can classify faces"""
+    engine = active_engine()
+    if engine is not None:
+        return engine.ready
+    return (pipeline or model_registry.get()).model is not None
+
+def model_trained():
+    """Like recognizer_ready(), but never loads the SVM pipeline just to answer"""
+    if active_engine() is None and not model_registry.loaded:
+        return os.path.exists(os.path.join(MODEL_DIR, ARTIFACTS['model']))
+    return recognizer_ready()
+
+def classify_encodings(face_encodings, pipeline=None):
+    """Run a batch of face encodings through the scaler -> PCA -> SVM pipeline
+
+    All encodings of a frame are stacked into one matrix so each stage is called
+    once per frame instead of once per face. The label is the argmax of
+    predict_proba, which avoids a separate predict() call.
+    With RECOGNITION_ENGINE=centroid or ann the batch goes to that engine instead.
+    Returns (labels, confidences) as arrays aligned with face_encodings.
+    """
+    engine = active_engine()
+    if engine is not None:
+        return engine.predict(face_encodings)
+
+    pipeline = pipeline or model_registry.get()
+    encodings = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+    encodings_scaled = pipeline.scaler.transform(encodings)
+    encodings_pca = pipeline.pca.transform(encodings_scaled)
+
+    prediction_proba = pipeline.model.predict_proba(encodings_pca)
+    best = prediction_proba.argmax(axis=1)
+    labels = pipeline.model.classes_[best]
+    confidences = prediction_proba[np.arange(len(best)), best]
+    return labels, confidences
+
+def identify_faces(face_encodings, pipeline=None):
+    """Classify a batch of encodings into [{'name', 'confidence', 'rollNo'}], Unknown below 0.6"""
     try:
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        image_data = base64.b64decode(image_data)
-        np_arr = np.frombuffer(image_data, np.uint8)
-        return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+        labels, confidences = classify_encodings(face_encodings, pipeline)
     except Exception as e:
-        logger.error(f"Error decoding base64 image: {e}")
+        logger.error(f"Error processing faces: {e}")
+        # Report every face as unknown if classification fails
+        labels = [None] * len(face_encodings)
+        confidences = [0.0] * len(face_encodings)
+
+    students = get_students_index()
+    identities = []
+    for predicted_class, confidence in zip(labels, confidences):
+        if confidence >= 0.6:
+            student = students.get(predicted_class)
+            identities.append({
+                'name': student['name'] if student else predicted_class,
+                'confidence': float(confidence),
+                'rollNo': predicted_class
+            })
+        else:
+            identities.append({'name': "Unknown", 'confidence': 0.0, 'rollNo': None})
+    return identities
+
+def parse_top_k(value):
+    """Requested topK as a positive int (None when absent); raises ValueError otherwise"""
+    if value is None or value == '':
         return None
-def atomic_write_json(path, data):
-    import tempfile
+    if isinstance(value, bool) or not str(value).strip().isdigit() or int(value) < 1:
+        raise ValueError("topK must be a positive integer")
+    return int(value)
+
+def nearest_candidates(face_encodings, k):
+    """Top-k stored encodings per face from the ANN index, as JSON-ready lists"""
+    distances, labels = ann_engine.search(face_encodings, k=k)
+    return [
+        [{"rollNo": label, "distance": round(float(distance), 4)}
+         for distance, label in zip(row_distances, row_labels) if label]
+        for row_distances, row_labels in zip(distances, labels)
+    ]
+
+def recognize_image(image, data, multiple=False):
+    """Decode, detect, encode and classify one uploaded image; returns (body, status)
+
+    Backs /api/recognize (best face only) and /api/recognize_multiple (every
+    face). Runs in the request thread, or in a pool process with SERVING_MODE=pool.
+    """
+    pipeline = model_registry.get()
+
     try:
-        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path), delete=False) as tmp:
-            json.dump(data, tmp, indent=2)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-        if os.path.exists(path):
-            os.remove(path)
-        os.replace(tmp.name, path)
-    except Exception as e:
-        logger.error(f"Atomic write failed for {path}: {e}")
-        raise
+        # Optional per-camera detection settings
+        detector = get_detector(data.get('detector'), data.get('detectionScale'))
+        # Optional top-k neighbours with distances (ann engine only)
+        top_k = parse_top_k(data.get('topK')) if RECOGNITION_ENGINE == 'ann' else None
+    except (ValueError, FileNotFoundError) as e:
+        return {"error": str(e)}, 400
 
-def retrain_model():
-    """Retrain the model with all available data"""
-    global model, scaler, pca, target_names
+    # Decode image
+    timer = StageTimer()
+    with timer.stage('decode'):
+        frame = decode_image(image)
+    if frame is None:
+        return {"error": "Invalid image data"}, 400
+
+    # Detect faces (possibly on a downscaled copy) and encode at full resolution
+    face_locations, face_encodings = detect_and_encode(frame, detector, timer)
+
+    if not face_encodings:
+        return {"error": "No faces detected" if multiple else "No face detected"}, 400
+
+    if not multiple:
+        # Predict
+        with timer.stage('classify'):
+            labels, confidences = classify_encodings(face_encodings[:1], pipeline)
+        predicted_class = labels[0]
+        confidence = confidences[0]
+
+        # Check confidence threshold
+        if confidence < 0.6:
+            return {"error": "Face not recognized with sufficient confidence"}, 400
 
+        response = {
+            "success": True,
+            "prediction": predicted_class,
+            "confidence": float(confidence),
+            "timestamp": datetime.now().isoformat()
+        }
+        if top_k:
+            response["candidates"] = nearest_candidates(face_encodings[:1], top_k)[0]
+        response["timings"] = timer.report()
+        return response, 200
+
+    # Classify every face of the frame in one pass through the pipeline
+    with timer.stage('classify'):
+        identities = identify_faces(face_encodings, pipeline)
+
+    candidates = nearest_candidates(face_encodings, top_k) if top_k else None
+
+    detected_faces = []
+    for i, ((top, right, bottom, left), identity) in enumerate(zip(face_locations, identities)):
+        face = dict(identity, **{
+            'x': left,
+            'y': top,
+            'width': right - left,
+            'height': bottom - top
+        })
+        if candidates is not None:
+            face['candidates'] = candidates[i]
+        detected_faces.append(face)
+
+    timings = timer.report()
+    logger.debug(f"recognize_multiple timings ({detector.backend}, scale {detector.scale}): {timings}")
+
+    return {
+        'success': True,
+        'faces': detected_faces,
+        'total_faces': len(detected_faces),
+        'timestamp': datetime.now().isoformat(),
+        'timings': timings
+    }, 200
+
+def encode_registration_face(image):
+    """Decode a registration frame and encode its first face; returns (encoding, error)"""
+    frame = decode_image(image)
+    if frame is None:
+        return None, "Invalid image data"
+
+    # Detect face
+    face_locations, face_encodings = detect_and_encode(frame, get_detector(), StageTimer())
+
+    if not face_encodings:
+        return None, "No face detected"
+    return face_encodings[0], None
+
+def encode_registration_faces(images):
+    """encode_registration_face over a chunk of frames (one pool task per chunk)"""
+    return [encode_registration_face(image) for image in images]
+
+def encode_burst(images):
+    """Encode burst frames in parallel, in order; returns a list of (encoding, error)"""
+    if inference_pool is None:
+        return list(burst_executor.map(encode_registration_face, images))
+
+    # Workers get contiguous chunks, submitted from threads so they run concurrently
+    images = [bytes(image) if isinstance(image, memoryview) else image for image in images]
+    n_chunks = min(inference_pool.workers, len(images))
+    chunks = [images[i * len(images) // n_chunks:(i + 1) * len(images) // n_chunks] for i in range(n_chunks)]
+    with ThreadPoolExecutor(max_workers=n_chunks) as submitter:
+        results = submitter.map(lambda chunk: inference_pool.submit(encode_registration_faces, chunk), chunks)
+        return [result for chunk in results for result in chunk]
+
+def merge_final_roster():
+    """Add registered students that are not yet in the final roster"""
+    added = get_student_registry().merge_final()
+    logger.info(f"Appended {added} new students to the final roster")
+
+def model_version():
     try:
-        X, y = [], []
+        with open(MODEL_VERSION_PATH, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def bump_model_version():
+    """Tell other processes (pool workers) that the recognizer changed"""
+    tmp_path = f"{MODEL_VERSION_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, MODEL_VERSION_PATH)
+
+def load_recognizer():
+    """(Re)load the configured recognizer from disk: SVM pickles, centroids or the ANN index"""
+    global loaded_model_version
+    # Read the stamp first so a publish during loading triggers another reload
+    loaded_model_version = model_version()
+    # The SVM pipeline loads on first use; once loaded, pick up artifacts written since
+    if model_registry.loaded:
+        model_registry.refresh()
+    if RECOGNITION_ENGINE == 'centroid':
+        if embedding_store.total:
+            centroid_engine.fit(*embedding_store.load())
+        else:
+            centroid_engine.reset()
+    if RECOGNITION_ENGINE == 'ann':
+        # Memory-map the prebuilt index
+        set_ann_index(IVFIndex.load(MODEL_DIR))
+
+def set_ann_index(index):
+    """Swap in an ANN index; students enrolled since it was built go (back) to the side buffer"""
+    ann_engine.set_index(index)
+    indexed = set(np.unique(index.labels)) if index is not None else set()
+    for roll_no in embedding_store.counts():
+        if roll_no not in indexed:
+            ann_engine.add(roll_no, embedding_store.get(roll_no))
+
+def init_inference_worker():
+    """Runs once in each pool process"""
+    embedding_store.reload()
+    load_recognizer()
+
+def refresh_recognizer():
+    """Reload in a pool process if the API process published a new model since"""
+    if model_version() != loaded_model_version:
+        logger.info("New model version published; reloading")
+        embedding_store.reload()
+        load_recognizer()
+
+def start_inference_pool():
+    global inference_pool
+    inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE,
+                                   initializer=init_inference_worker, refresh=refresh_recognizer)
 
-        for student_id in os.listdir(DATASET_DIR):
-            student_path = os.path.join(DATASET_DIR, student_id)
-            if not os.path.isdir(student_path):
-                continue
+def run_inference(task, image, *args):
+    """Run task(image, *args) here, or in the worker pool when SERVING_MODE=pool"""
+    if inference_pool is None:
+        return task(image, *args)
+    if isinstance(image, memoryview):
+        # Upload views cannot be pickled; hand the workers a copy
+        image, view = bytes(image), image
+        view.release()
+    return inference_pool.submit(task, image, *args)
 
-            for file in os.listdir(student_path):
-                if file.endswith('.npy'):
-                    encoding = np.load(os.path.join(student_path, file))
-                    if encoding.shape == (128,):
-                        X.append(encoding)
-                        y.append(student_id)
+def busy_response(e):
+    response = jsonify({"error": "Server busy, retry shortly"})
+    response.headers['Retry-After'] = '1'
+    logger.warning(str(e))
+    return response, 503
 
-        if not X:
+def retrain_model():
+    """Retrain the model with all available data"""
+    try:
+        X, y = embedding_store.load()
+
+        if not len(X):
             logger.warning("No training data found")
             return False
 
+        if RECOGNITION_ENGINE == 'centroid':
+            centroid_engine.fit(X, y)
+            bump_model_version()
+            health_counters.set(model_trained=centroid_engine.ready)
+            merge_final_roster()
+            return True
+
+        if RECOGNITION_ENGINE == 'ann':
+            IVFIndex.build(X, y).save(MODEL_DIR)
+            # set_index empties the side buffer, which may hold students enrolled during the build
+            set_ann_index(IVFIndex.load(MODEL_DIR))
+            bump_model_version()
+            health_counters.set(model_trained=ann_engine.ready)
+            merge_final_roster()
+            return True
+
         if len(set(y)) < 2:
             logger.warning("Need at least 2 different students to train model")
             return False
 
-        X = np.array(X)
-        y = np.array(y)
-
+        # Fit fresh models; the published pipeline stays untouched until the swap
+        scaler = StandardScaler()
+        pca = PCA(n_components=50)
         X_scaled = scaler.fit_transform(X)
         X_pca = pca.fit_transform(X_scaled)
 
         model = SVC(kernel='linear', probability=True, random_state=42)
         model.fit(X_pca, y)
-
-        joblib.dump(model, os.path.join(MODEL_DIR, 'svm_face_model.pkl'))
-        joblib.dump(scaler, os.path.join(MODEL_DIR, 'scaler.pkl'))
-        joblib.dump(pca, os.path.join(MODEL_DIR, 'pca.pkl'))
-        joblib.dump(np.unique(y), os.path.join(MODEL_DIR, 'target_names.pkl'))
-
         target_names = np.unique(y)
-        logger.info(f"Model retrained on {len(X)} samples from students: {sorted(set(y))}")
-
-        # --------------------------------------------
-        # Append students.json data to final.json
-        # --------------------------------------------
-        final_path = os.path.join(BASE_DIR, 'final.json')
-        students_db = load_students_db()
-
-        # Load existing final.json
-        if os.path.exists(final_path):
-            with open(final_path, 'r') as f:
-                final_data = json.load(f)
-        else:
-            final_data = []
 
-        # Merge data without duplicating roll numbers
-        existing_roll_nos = {s['rollNo'] for s in final_data}
-        new_students = [s for s in students_db if s['rollNo'] not in existing_roll_nos]
-        final_data.extend(new_students)
+        # Written to models/ and swapped in for every reader at once
+        version = model_registry.publish(FacePipeline(model, scaler, pca, target_names))
+        bump_model_version()
+        health_counters.set(model_trained=True)
+        logger.info(f"Model retrained on {len(X)} samples from students: {sorted(set(y))} (version {version})")
 
-        atomic_write_json(final_path, final_data)
-        logger.info(f"Appended {len(new_students)} new students to final.json")
+        merge_final_roster()
 
         return True
 
@@ -182,156 +505,203 @@ def retrain_model():
         return False
 
 
+def scan_dataset():
+    """Count students and samples from disk and the registry (what the health counters track)"""
+    registry = get_student_registry()
+    # Re-read the label index, which also picks up appends made by other processes
+    embedding_store.reload()
+    return {
+        "students_count": registry.count(),
+        "pending_count": registry.count('pending'),
+        "total_samples": embedding_store.total,
+        "model_trained": model_trained()
+    }
+
+# Kept up to date by register/retrain/reset and recounted every HEALTH_RECONCILE_SECONDS
+health_counters = HealthCounters(scan_dataset, interval=HEALTH_RECONCILE_SECONDS)
+
 # Initialize models on startup
-load_models()
+load_recognizer()
+try:
+    get_detector()
+except (ValueError, FileNotFoundError) as e:
+    logger.error(f"Invalid face detector configuration ({e}); falling back to hog at full resolution")
+    FACE_DETECTOR, DETECTION_SCALE = 'hog', 1.0
+if RECOGNITION_ENGINE == 'ann' and ann_engine.index is None and embedding_store.total:
+    # Build the index once if it is missing
+    retrain_model()
+
+# Completed registrations queue a retrain here instead of running it in the request
+retrain_worker = RetrainWorker(retrain_model, debounce_seconds=RETRAIN_DEBOUNCE_SECONDS)
+
+health_counters.reconcile()
+
+
+def save_registration_samples(roll_no, name, encodings):
+    """Append a student's encodings and complete the registration at REQUIRED_SAMPLES
+
+    Returns (sample_count, retrain_job); retrain_job is the queued retrain when
+    this call completed the registration and the engine needs one.
+    """
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, embedding_store.dim)
+    index = embedding_store.append(roll_no, encodings)
 
+    # Upsert the pending entry; at REQUIRED_SAMPLES it moves to the registered roster
+    # in the same transaction, and only one racing frame sees completed_now
+    _, completed_now = get_student_registry().record_sample(roll_no, name, index, REQUIRED_SAMPLES)
+
+    health_counters.add('total_samples', len(encodings))
+    if index == len(encodings):
+        health_counters.add('pending_count')
+    if completed_now:
+        health_counters.add('pending_count', -1)
+        health_counters.add('students_count')
+
+    if not completed_now:
+        return index, None
+    if RECOGNITION_ENGINE == 'centroid':
+        # Only this student's centroid changes; no refit needed
+        centroid_engine.add(roll_no, embedding_store.get(roll_no))
+        bump_model_version()
+        health_counters.set(model_trained=centroid_engine.ready)
+        merge_final_roster()
+        return index, None
+    if RECOGNITION_ENGINE == 'ann':
+        # Searchable right away from the side buffer; the index rebuild runs in the background
+        ann_engine.add(roll_no, embedding_store.get(roll_no))
+        bump_model_version()
+        health_counters.set(model_trained=ann_engine.ready)
+    return index, retrain_worker.request(roll_no)
 
 @app.route('/api/register', methods=['POST'])
 def register_student():
     """Register a new student (writes to pending until complete)"""
     try:
-        data = request.get_json()
-        image_b64 = data.get('image')
+        # JSON with a base64 image, or an image/jpeg / multipart body
+        data, image = read_image_request()
         name = data.get('name')
         roll_no = data.get('rollNo')
 
-        if not all([image_b64, name, roll_no]):
+        if not all([image is not None, name, roll_no]):
             return jsonify({"error": "Missing image, name or roll number"}), 400
 
-        # Decode image
-        frame = decode_base64_image(image_b64)
-        if frame is None:
-            return jsonify({"error": "Invalid image data"}), 400
-
-        # Detect face
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-
-        if not face_encodings:
-            return jsonify({"error": "No face detected"}), 400
-
-        face_encoding = face_encodings[0]
+        # Decode, detect and encode (in a pool worker with SERVING_MODE=pool)
+        face_encoding, error = run_inference(encode_registration_face, image)
+        if error:
+            return jsonify({"error": error}), 400
 
         # Save encoding to dataset
-        student_id = roll_no
-        folder = os.path.join(DATASET_DIR, student_id)
-        os.makedirs(folder, exist_ok=True)
-        existing_files = [f for f in os.listdir(folder) if f.endswith(".npy")]
-        sample_count = len(existing_files)
+        sample_count = embedding_store.count(roll_no)
 
-        if sample_count >= 50:
+        if sample_count >= REQUIRED_SAMPLES:
             return jsonify({
-                "message": "Already collected 50 samples. Registration complete.",
+                "message": f"Already collected {REQUIRED_SAMPLES} samples. Registration complete.",
                 "registrationComplete": True,
                 "sampleCount": sample_count
             }), 200
 
-        index = sample_count + 1
-        np.save(os.path.join(folder, f"{index}.npy"), face_encoding)
+        index, retrain_job = save_registration_samples(roll_no, name, face_encoding)
 
-        # Load or initialize pending DB
-        pending_path = os.path.join(BASE_DIR, 'pending_students.json')
-        if os.path.exists(pending_path):
-            with open(pending_path, 'r') as f:
-                pending_db = json.load(f)
-        else:
-            pending_db = []
+        if index >= REQUIRED_SAMPLES:
+            return jsonify({
+                "message": f"Frame {index} saved for {name}",
+                "sampleCount": index,
+                "registrationComplete": True,
+                "retrainJob": retrain_job
+            }), 200
 
-        # Find existing pending entry
-        existing_student = next((s for s in pending_db if s['rollNo'] == roll_no), None)
+        return jsonify({
+            "message": f"Frame {index} saved for {name}",
+            "sampleCount": index,
+            "registrationComplete": index >= REQUIRED_SAMPLES
+        }), 200
 
-        if existing_student:
-            existing_student['sampleCount'] = index
-            existing_student['registrationComplete'] = (index >= 50)
-        else:
-            existing_student = {
-                "name": name,
-                "rollNo": roll_no,
-                "sampleCount": index,
-                "registrationComplete": (index >= 50),
-                "createdAt": datetime.now().isoformat()
-            }
-            pending_db.append(existing_student)
+    except PoolSaturated as e:
+        return busy_response(e)
+    except Exception as e:
+        logger.error(f"Error in register endpoint: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        # Save updated pending DB
-        
+@app.route('/api/register/burst', methods=['POST'])
+def register_student_burst():
+    """Enroll a student from a short video clip or an array of frames in one request"""
+    try:
+        timer = StageTimer()
+        # JSON {frames: [...]} or {video: ...}, a video/* body, or multipart frames/video parts
+        data, frames, video = read_burst_request()
+        name = data.get('name')
+        roll_no = data.get('rollNo')
 
-        
+        if not (frames or video) or not name or not roll_no:
+            return jsonify({"error": "Missing frames or video, name or roll number"}), 400
+        if len(frames) > BURST_MAX_FRAMES:
+            return jsonify({"error": f"At most {BURST_MAX_FRAMES} frames per request"}), 400
 
-        # If registration complete, move to final DB
-        if index >= 50:
-            # Load students.json
-            students_db = load_students_db()
+        sample_count = embedding_store.count(roll_no)
+        if sample_count >= REQUIRED_SAMPLES:
+            return jsonify({
+                "message": f"Already collected {REQUIRED_SAMPLES} samples. Registration complete.",
+                "registrationComplete": True,
+                "sampleCount": sample_count
+            }), 200
+        needed = REQUIRED_SAMPLES - sample_count
 
-            # Check again to prevent duplicates
-            if not any(s['rollNo'] == roll_no for s in students_db):
-                students_db.append(existing_student)
-                save_students_db(students_db)
+        if video:
+            with timer.stage('sample'):
+                # Some sampled frames will have no usable face, so take half again as many
+                frames = sample_video_frames(video, min(BURST_MAX_FRAMES, needed + needed // 2))
+            if not frames:
+                return jsonify({"error": "Could not read any frames from the video"}), 400
 
-            # Remove from pending
-            pending_db = [s for s in pending_db if s['rollNo'] != roll_no]
-            atomic_write_json(pending_path, pending_db)
+        with timer.stage('encode'):
+            results = encode_burst(frames)
+        encodings = [encoding for encoding, error in results if error is None]
+        rejected = {}
+        for _, error in results:
+            if error is not None:
+                rejected[error] = rejected.get(error, 0) + 1
+        if not encodings:
+            return jsonify({"error": "No face detected in any frame", "rejected": rejected}), 400
 
-            retrain_model()
+        # Every accepted encoding in one append, and one registry update
+        with timer.stage('save'):
+            accepted = encodings[:needed]
+            index, retrain_job = save_registration_samples(roll_no, name, accepted)
 
         return jsonify({
-            "message": f"Frame {index} saved for {name}",
+            "message": f"{len(accepted)} frames saved for {name}",
             "sampleCount": index,
-            "registrationComplete": index >= 50
+            "framesReceived": len(frames),
+            "accepted": len(accepted),
+            "rejected": rejected,
+            "registrationComplete": index >= REQUIRED_SAMPLES,
+            "retrainJob": retrain_job,
+            "timings": timer.report()
         }), 200
 
+    except PoolSaturated as e:
+        return busy_response(e)
     except Exception as e:
-        logger.error(f"Error in register endpoint: {e}")
+        logger.error(f"Error in burst register endpoint: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/recognize', methods=['POST'])
 def recognize_face():
     """Recognize a face in uploaded image"""
     try:
-        if model is None:
+        if not recognizer_ready():
             return jsonify({"error": "Model not trained yet"}), 400
         
-        data = request.get_json()
-        image_b64 = data.get('image')
+        data, image = read_image_request()
         
-        if not image_b64:
+        if image is None:
             return jsonify({"error": "No image provided"}), 400
+
+        body, status = run_inference(recognize_image, image, data, False)
+        return jsonify(body), status
         
-        # Decode image
-        frame = decode_base64_image(image_b64)
-        if frame is None:
-            return jsonify({"error": "Invalid image data"}), 400
-        
-        # Convert to RGB and detect faces
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        if not face_encodings:
-            return jsonify({"error": "No face detected"}), 400
-        
-        # Preprocess face encoding
-        face_encoding = face_encodings[0].reshape(1, -1)
-        face_encoding_scaled = scaler.transform(face_encoding)
-        face_encoding_pca = pca.transform(face_encoding_scaled)
-        
-        # Predict
-        prediction_proba = model.predict_proba(face_encoding_pca)[0]
-        predicted_class = model.predict(face_encoding_pca)[0]
-        confidence = max(prediction_proba)
-        
-        # Check confidence threshold
-        if confidence < 0.6:
-            return jsonify({"error": "Face not recognized with sufficient confidence"}), 400
-        
-        return jsonify({
-            "success": True,
-            "prediction": predicted_class,
-            "confidence": float(confidence),
-            "timestamp": datetime.now().isoformat()
-        }), 200
-        
+    except PoolSaturated as e:
+        return busy_response(e)
     except Exception as e:
         logger.error(f"Error in recognize endpoint: {e}")
         return jsonify({"error": str(e)}), 500
@@ -340,7 +710,7 @@ def recognize_face():
 def get_students():
     """Get list of registered students"""
     try:
-        students_db = load_students_db()
+        students_db = list(get_students_index().values())
         return jsonify({"students": students_db}), 200
         
     except Exception as e:
@@ -351,9 +721,14 @@ def get_students():
 def retrain_model_endpoint():
     """Retrain the face recognition model"""
     try:
-        success = retrain_model()
-        if success:
-            return jsonify({"success": True, "message": "Model retrained successfully"}), 200
+        # ?async=true queues a background job instead of waiting for it
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            job_id = retrain_worker.request('manual')
+            return jsonify({"success": True, "message": "Retrain queued", "job": job_id}), 202
+
+        job = retrain_worker.run_now()
+        if job['state'] == 'succeeded':
+            return jsonify({"success": True, "message": "Model retrained successfully", "job": job['id']}), 200
         else:
             return jsonify({"error": "Failed to retrain model"}), 400
         
@@ -361,36 +736,79 @@ def retrain_model_endpoint():
         logger.error(f"Error in retrain endpoint: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/retrain/status', methods=['GET'])
+def retrain_status():
+    """Status of pending, running and last background retrain jobs"""
+    try:
+        return jsonify(retrain_worker.status()), 200
+
+    except Exception as e:
+        logger.error(f"Error in retrain status endpoint: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (constant time: reads the in-memory counters only)"""
     try:
-        students_db = load_students_db()
-        
-        # Count total samples
-        total_samples = 0
-        for student_dir in os.listdir(DATASET_DIR):
-            student_path = os.path.join(DATASET_DIR, student_dir)
-            if os.path.isdir(student_path):
-                total_samples += len([f for f in os.listdir(student_path) if f.endswith('.npy')])
-        
-        return jsonify({
-            "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
-            "students_count": len(students_db),
-            "total_samples": total_samples,
-            "model_trained": model is not None
-        }), 200
+        health_counters.ensure_started()
+        return jsonify(dict(
+            health_counters.snapshot(),
+            status="healthy",
+            timestamp=datetime.now().isoformat(),
+            recognition_engine=RECOGNITION_ENGINE,
+            face_model=model_registry.info(),
+            serving_mode=SERVING_MODE,
+            inference_pool=inference_pool.stats() if inference_pool else None
+        )), 200
         
     except Exception as e:
         logger.error(f"Error in health check: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/health/deep', methods=['GET'])
+def deep_health_check():
+    """Full scan of the dataset, registry and models; also resets the health counters"""
+    try:
+        start = time.perf_counter()
+        if active_engine() is None:
+            # Loads the SVM pipeline if it is not loaded yet, so unreadable artifacts show up here
+            model_registry.refresh()
+        drift = health_counters.reconcile()
+        problems = []
+
+        X, _ = embedding_store.load()
+        expected_bytes = len(X) * embedding_store.dim * np.dtype(np.float32).itemsize
+        matrix_path = embedding_store.matrix_path
+        matrix_bytes = os.path.getsize(matrix_path) if os.path.exists(matrix_path) else 0
+        if matrix_bytes != expected_bytes:
+            problems.append(f"embeddings.f32 holds {matrix_bytes} bytes, expected {expected_bytes} for {len(X)} labels")
+
+        registry = get_student_registry()
+        counts = embedding_store.counts()
+        short = [s['rollNo'] for s in registry.students() if counts.get(s['rollNo'], 0) < REQUIRED_SAMPLES]
+        if short:
+            problems.append(f"{len(short)} registered students have fewer than {REQUIRED_SAMPLES} samples: {short[:20]}")
+
+        return jsonify(dict(
+            health_counters.snapshot(),
+            status="healthy" if not problems else "degraded",
+            timestamp=datetime.now().isoformat(),
+            problems=problems,
+            drift={name: {"counted": counted, "cached": cached} for name, (counted, cached) in drift.items()},
+            face_model=model_registry.info(),
+            scan_ms=round((time.perf_counter() - start) * 1000, 2)
+        )), 200
+
+    except Exception as e:
+        logger.error(f"Error in deep health check: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/reset', methods=['POST'])
 def reset_system():
     """Reset the entire system (for development/testing)"""
     try:
         # Clear dataset directory
+        embedding_store.clear()
         if os.path.exists(DATASET_DIR):
             for item in os.listdir(DATASET_DIR):
                 item_path = os.path.join(DATASET_DIR, item)
@@ -402,22 +820,18 @@ def reset_system():
                     os.remove(item_path)
         
         # Clear model files
-        model_files = ['svm_face_model.pkl', 'scaler.pkl', 'pca.pkl', 'target_names.pkl']
-        for file_name in model_files:
-            file_path = os.path.join(MODEL_DIR, file_name)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        model_registry.clear()
+        IVFIndex.remove(MODEL_DIR)
         
-        # Clear students database
-        if os.path.exists(STUDENTS_DB_PATH):
-            os.remove(STUDENTS_DB_PATH)
+        # Clear the pending and registered rosters
+        get_student_registry().clear_students()
+        refresh_students_index()
+        health_counters.set(students_count=0, pending_count=0, total_samples=0, model_trained=False)
         
         # Reset global variables
-        global model, scaler, pca, target_names
-        model = None
-        scaler = StandardScaler()
-        pca = PCA(n_components=50)
-        target_names = None
+        centroid_engine.reset()
+        ann_engine.reset()
+        bump_model_version()
         
         return jsonify({"success": True, "message": "System reset successfully"}), 200
         
@@ -429,109 +843,193 @@ def reset_system():
 def recognize_multiple_faces():
     """Recognize multiple faces in uploaded image"""
     try:
-        if model is None:
+        if not recognizer_ready():
             return jsonify({"error": "Model not trained yet"}), 400
         
-        data = request.get_json()
-        image_b64 = data.get('image')
+        data, image = read_image_request()
         
-        if not image_b64:
+        if image is None:
             return jsonify({"error": "No image provided"}), 400
+
+        body, status = run_inference(recognize_image, image, data, True)
+        return jsonify(body), status
         
-        # Decode image
-        frame = decode_base64_image(image_b64)
+    except PoolSaturated as e:
+        return busy_response(e)
+    except Exception as e:
+        logger.error(f"Error in recognize_multiple_faces endpoint: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# Streaming attendance: one FaceTracker per session, so consecutive frames of a
+# camera only pay for detection on keyframes and for encoding new faces
+stream_sessions = {}
+stream_sessions_lock = threading.Lock()
+
+def expire_stream_sessions():
+    now = time.monotonic()
+    with stream_sessions_lock:
+        for session_id in [s.id for s in stream_sessions.values() if now - s.last_used > STREAM_SESSION_TTL]:
+            del stream_sessions[session_id]
+            logger.info(f"Stream session {session_id} expired")
+
+def create_stream_session(options):
+    """Start a session; options may set detector, detectionScale and keyframeInterval"""
+    expire_stream_sessions()
+    detector = get_detector(options.get('detector'), options.get('detectionScale'))
+    tracker = FaceTracker(keyframe_interval=int(options.get('keyframeInterval') or STREAM_KEYFRAME_INTERVAL))
+    session = StreamSession(base64.urlsafe_b64encode(os.urandom(12)).decode(), tracker, detector)
+    with stream_sessions_lock:
+        stream_sessions[session.id] = session
+    return session
+
+def process_stream_frame(session, frame):
+    """Advance a session's tracker by one BGR frame and return the incremental result"""
+    pipeline = model_registry.get()
+    timer = StageTimer()
+    with session.lock:
+        session.last_used = time.monotonic()
+        result = session.tracker.process(
+            frame,
+            detect=session.detector.detect,
+            encode=face_recognition.face_encodings,
+            identify=lambda encodings: identify_faces(encodings, pipeline),
+            timer=timer)
+        for event in result['events']:
+            if event.get('rollNo'):
+                session.present[event['rollNo']] = max(event['confidence'], session.present.get(event['rollNo'], 0.0))
+    result['timings'] = timer.report()
+    return result
+
+def stream_session_summary(session):
+    return {
+        'sessionId': session.id,
+        'frames': session.tracker.frame_index,
+        'present': [{'rollNo': roll_no, 'confidence': confidence}
+                    for roll_no, confidence in session.present.items()]
+    }
+
+@app.route('/api/stream/sessions', methods=['POST'])
+def start_stream_session():
+    """Start a tracked attendance stream (HTTP transport)"""
+    if not recognizer_ready():
+        return jsonify({"error": "Model not trained yet"}), 400
+    try:
+        session = create_stream_session(request.get_json(silent=True) or {})
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        'success': True,
+        'sessionId': session.id,
+        'keyframeInterval': session.tracker.keyframe_interval
+    }), 201
+
+@app.route('/api/stream/sessions/<session_id>/frames', methods=['POST'])
+def push_stream_frame(session_id):
+    """Process the next frame of a stream: image/jpeg, multipart or JSON {"image": base64} body"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired stream session"}), 404
+    try:
+        _, image = read_image_request()
+        if image is None:
+            return jsonify({"error": "No image provided"}), 400
+        frame = decode_image(image)
         if frame is None:
             return jsonify({"error": "Invalid image data"}), 400
-        
-        # Convert to RGB and detect faces
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        if not face_encodings:
-            return jsonify({"error": "No faces detected"}), 400
-        
-        detected_faces = []
-        
-        # Process each detected face
-        for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-            try:
-                # Preprocess face encoding using your trained model pipeline
-                face_encoding_reshaped = face_encoding.reshape(1, -1)
-                face_encoding_scaled = scaler.transform(face_encoding_reshaped)
-                face_encoding_pca = pca.transform(face_encoding_scaled)
-                
-                # Predict using your trained SVM model
-                prediction_proba = model.predict_proba(face_encoding_pca)[0]
-                predicted_class = model.predict(face_encoding_pca)[0]
-                confidence = max(prediction_proba)
-                
-                # Check confidence threshold
-                if confidence >= 0.6:
-                    name = predicted_class
-                    
-                    # Load student name from database
-                    students_db = load_students_db()
-                    student_name = None
-                    for student in students_db:
-                        if student['rollNo'] == predicted_class:
-                            student_name = student['name']
-                            break
-                    
-                    if student_name:
-                        name = student_name
-                else:
-                    name = "Unknown"
-                    confidence = 0.0
-                
-                detected_faces.append({
-                    'name': name,
-                    'confidence': float(confidence),
-                    'rollNo': predicted_class if confidence >= 0.6 else None,
-                    'x': left,
-                    'y': top,
-                    'width': right - left,
-                    'height': bottom - top
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing face: {e}")
-                # Add unknown face if processing fails
-                detected_faces.append({
-                    'name': "Unknown",
-                    'confidence': 0.0,
-                    'rollNo': None,
-                    'x': left,
-                    'y': top,
-                    'width': right - left,
-                    'height': bottom - top
-                })
-        
-        return jsonify({
-            'success': True,
-            'faces': detected_faces,
-            'total_faces': len(detected_faces),
-            'timestamp': datetime.now().isoformat()
-        })
-        
+        return jsonify(dict(process_stream_frame(session, frame), success=True))
     except Exception as e:
-        logger.error(f"Error in recognize_multiple_faces endpoint: {e}")
+        logger.error(f"Error in stream frame endpoint: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/stream/sessions/<session_id>', methods=['DELETE'])
+def end_stream_session(session_id):
+    """End a stream and return everyone identified during it"""
+    with stream_sessions_lock:
+        session = stream_sessions.pop(session_id, None)
+    if session is None:
+        return jsonify({"error": "Unknown or expired stream session"}), 404
+    return jsonify(dict(stream_session_summary(session), success=True))
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/api/stream')
+    def stream_socket(ws):
+        """WebSocket transport: binary messages are JPEG frames, text messages JSON
+
+        An optional first text message {"detector", "detectionScale",
+        "keyframeInterval"} configures the session; every frame is answered
+        with the tracker's events and current boxes, and {"end": true} returns
+        the session summary and closes the stream.
+        """
+        session = None
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, str):
+                    data = json.loads(message)
+                    if data.get('end'):
+                        if session is not None:
+                            ws.send(json.dumps(dict(stream_session_summary(session), type='summary')))
+                        break
+                    if session is None and 'image' not in data:
+                        session = create_stream_session(data)
+                        ws.send(json.dumps({'type': 'session', 'sessionId': session.id}))
+                        continue
+                    frame = decode_base64_image(data.get('image') or '')
+                else:
+                    frame = decode_image_buffer(message)
+
+                if session is None:
+                    session = create_stream_session({})
+                if frame is None:
+                    ws.send(json.dumps({'type': 'error', 'error': "Invalid image data"}))
+                    continue
+                ws.send(json.dumps(dict(process_stream_frame(session, frame), type='frame')))
+        except (ValueError, FileNotFoundError) as e:
+            ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+        finally:
+            if session is not None:
+                with stream_sessions_lock:
+                    stream_sessions.pop(session.id, None)
+else:
+    logger.info("flask_sock not installed; streaming is available over /api/stream/sessions only")
+
 if __name__ == '__main__':
     print("Starting Face Recognition API Server...")
     print("Server will run on http://localhost:5001")
     print("Available endpoints:")
     print("  POST /api/register - Register a new student")
+    print("  POST /api/register/burst - Enroll from a video clip or frame array")
     print("  POST /api/recognize - Recognize a face")
     print("  GET  /api/students - Get registered students")
+    print("  POST /api/save-attendance - Save a class's attendance")
+    print("  GET  /api/attendance/students/<rollNo>[/totals] - Attendance history / running totals")
+    print("  GET  /api/attendance/courses/<courseId> - Sessions of a course")
     print("  POST /api/retrain - Retrain the model")
+    print("  GET  /api/retrain/status - Background retrain job status")
     print("  GET  /api/health - Health check")
+    print("  GET  /api/health/deep - Full dataset and model check")
     print("  POST /api/reset - Reset system (dev only)")
+    print("  POST /api/stream/sessions - Start a tracked frame stream (WS: /api/stream)")
     print()
     print("Make sure the following directories exist:")
     print(f"  - {MODEL_DIR}")
     print(f"  - {DATASET_DIR}")
     print()
     
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    if SERVING_MODE == 'pool':
+        # Fork the inference workers before any request threads exist
+        start_inference_pool()
+        try:
+            from waitress import serve
+        except ImportError:
+            serve = None
+        if serve is not None:
+            serve(app, host='0.0.0.0', port=5001, threads=INFERENCE_WORKERS + INFERENCE_QUEUE_SIZE + 4)
+        else:
+            app.run(host='0.0.0.0', port=5001, threaded=True)
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5001)
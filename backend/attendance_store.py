@@ -0,0 +1,270 @@
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+ATTENDANCE_DB_PATH = os.environ.get('ATTENDANCE_DB_PATH', os.path.join(BASE_DIR, 'attendance.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    session_date TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    course_id TEXT NOT NULL,
+    session_date TEXT NOT NULL,
+    roll_no TEXT NOT NULL,
+    name TEXT,
+    status TEXT NOT NULL,
+    confidence REAL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_course_date ON sessions (course_id, session_date);
+CREATE INDEX IF NOT EXISTS attendance_roll_date ON attendance (roll_no, session_date);
+CREATE INDEX IF NOT EXISTS attendance_course_date ON attendance (course_id, session_date);
+CREATE INDEX IF NOT EXISTS attendance_session ON attendance (session_id);
+CREATE TABLE IF NOT EXISTS course_totals (
+    course_id TEXT PRIMARY KEY,
+    sessions_held INTEGER NOT NULL,
+    last_session_date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attendance_totals (
+    roll_no TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    sessions_recorded INTEGER NOT NULL,
+    sessions_present INTEGER NOT NULL,
+    last_seen TEXT,
+    PRIMARY KEY (roll_no, course_id)
+) WITHOUT ROWID;
+"""
+
+# Counter upserts run in the same transaction as the session they count
+UPSERT_COURSE_TOTAL = """
+INSERT INTO course_totals (course_id, sessions_held, last_session_date) VALUES (?, 1, ?)
+ON CONFLICT (course_id) DO UPDATE SET
+    sessions_held = sessions_held + 1,
+    last_session_date = MAX(last_session_date, excluded.last_session_date)
+"""
+UPSERT_STUDENT_TOTAL = """
+INSERT INTO attendance_totals (roll_no, course_id, sessions_recorded, sessions_present, last_seen)
+VALUES (?, ?, 1, ?, ?)
+ON CONFLICT (roll_no, course_id) DO UPDATE SET
+    sessions_recorded = sessions_recorded + 1,
+    sessions_present = sessions_present + excluded.sessions_present,
+    last_seen = COALESCE(MAX(last_seen, excluded.last_seen), last_seen, excluded.last_seen)
+"""
+
+# Recount the totals from history, optionally for one course ({where} is '' or 'WHERE course_id = ?')
+COUNT_COURSE_TOTALS = """
+INSERT INTO course_totals (course_id, sessions_held, last_session_date)
+SELECT course_id, COUNT(*), MAX(session_date) FROM sessions {where} GROUP BY course_id
+"""
+COUNT_STUDENT_TOTALS = """
+INSERT INTO attendance_totals (roll_no, course_id, sessions_recorded, sessions_present, last_seen)
+SELECT roll_no, course_id, COUNT(*), SUM(present), MAX(CASE WHEN present THEN session_date END)
+FROM (SELECT roll_no, course_id, session_date, MAX(status = 'present') AS present
+      FROM attendance {where} GROUP BY session_id, roll_no)
+GROUP BY roll_no, course_id
+"""
+
+RECORD_COLUMNS = ('course_id', 'session_date', 'roll_no', 'name', 'status', 'confidence', 'timestamp')
+
+
+class AttendanceStore:
+    """Attendance history in SQLite (WAL mode)
+
+    Every save is one session row (a class held for a course on a date) plus
+    one row per student, inserted in a single transaction. Saving the same
+    course and date again replaces that session and its rows. The (course_id,
+    session_date) and (roll_no, session_date) indexes keep student and course
+    history queries to an index range scan, however many sessions have been
+    recorded. Each thread gets its own connection; WAL lets readers run while
+    a class is being saved.
+
+    Running totals are kept next to the history: sessions held per course and,
+    per student and course, sessions recorded, sessions present and the last
+    date seen present. They are upserted in the same transaction as the
+    session (recounted for the course when a session is replaced), so reading
+    a student's attendance percentage is a primary-key lookup instead of a
+    scan of their history.
+    """
+
+    def __init__(self, path=ATTENDANCE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before the totals existed get them built once
+            if conn.execute('SELECT 1 FROM attendance LIMIT 1').fetchone() and \
+                    not conn.execute('SELECT 1 FROM course_totals LIMIT 1').fetchone():
+                self.rebuild_totals(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def append_session(self, course_id, records, session_date=None):
+        """Record one class of course_id with its attendance records; returns the session id
+
+        records are dicts with rollNo and optionally name, status (default
+        'present'), confidence and timestamp, as sent by the frontend.
+        session_date is YYYY-MM-DD (default today); a session already saved for
+        the same course and date is replaced, not counted a second time.
+        """
+        now = datetime.now()
+        session_date = str(session_date or now.strftime('%Y-%m-%d'))
+        try:
+            valid_date = datetime.strptime(session_date, '%Y-%m-%d').strftime('%Y-%m-%d') == session_date
+        except ValueError:
+            valid_date = False
+        if not valid_date:
+            raise ValueError(f"Invalid date {session_date!r}; expected YYYY-MM-DD")
+        rows = []
+        for record in records:
+            roll_no = record.get('rollNo')
+            if roll_no is None or str(roll_no) == '':
+                raise ValueError("Every attendance record needs a rollNo")
+            confidence = record.get('confidence')
+            rows.append((str(course_id), session_date, str(roll_no), record.get('name'),
+                         record.get('status') or 'present',
+                         float(confidence) if confidence is not None else None,
+                         record.get('timestamp') or now.strftime('%Y-%m-%d %H:%M:%S')))
+
+        conn = self._connect()
+        with conn:
+            # Deleting first takes the write lock, so two saves of the same class cannot both insert
+            conn.execute('DELETE FROM attendance WHERE session_id IN '
+                         '(SELECT id FROM sessions WHERE course_id = ? AND session_date = ?)',
+                         (str(course_id), session_date))
+            replaced = conn.execute('DELETE FROM sessions WHERE course_id = ? AND session_date = ?',
+                                    (str(course_id), session_date)).rowcount
+            session_id = conn.execute(
+                'INSERT INTO sessions (course_id, session_date, recorded_at) VALUES (?, ?, ?)',
+                (str(course_id), session_date, now.isoformat(timespec='seconds'))).lastrowid
+            conn.executemany(
+                f'INSERT INTO attendance (session_id, {", ".join(RECORD_COLUMNS)}) '
+                f'VALUES (?, {", ".join("?" for _ in RECORD_COLUMNS)})',
+                [(session_id,) + row for row in rows])
+
+            if replaced:
+                self._count_totals(conn, course_id)
+                return session_id
+            conn.execute(UPSERT_COURSE_TOTAL, (str(course_id), session_date))
+            # A student listed twice in one session counts once, as present if either entry is
+            present = {}
+            for row in rows:
+                present[row[2]] = present.get(row[2], False) or row[4] == 'present'
+            conn.executemany(UPSERT_STUDENT_TOTAL, [
+                (roll_no, str(course_id), int(was_present), session_date if was_present else None)
+                for roll_no, was_present in present.items()])
+        return session_id
+
+    def rebuild_totals(self, conn=None):
+        """Recompute every counter from the full history"""
+        conn = conn or self._connect()
+        logger.info("Rebuilding attendance totals from history")
+        with conn:
+            self._count_totals(conn)
+
+    @staticmethod
+    def _count_totals(conn, course_id=None):
+        """Replace the counters of course_id (or of every course) with a recount of its history"""
+        where, params = ('WHERE course_id = ?', (str(course_id),)) if course_id is not None else ('', ())
+        conn.execute(f'DELETE FROM course_totals {where}', params)
+        conn.execute(f'DELETE FROM attendance_totals {where}', params)
+        conn.execute(COUNT_COURSE_TOTALS.format(where=where), params)
+        conn.execute(COUNT_STUDENT_TOTALS.format(where=where), params)
+
+    def student_totals(self, roll_no, course_id=None):
+        """Per-course counters of one student, with the course's sessions held"""
+        query = ['SELECT t.course_id AS courseId, c.sessions_held AS sessionsHeld, '
+                 't.sessions_recorded AS sessionsRecorded, t.sessions_present AS sessionsPresent, '
+                 't.last_seen AS lastSeen FROM attendance_totals t JOIN course_totals c USING (course_id) '
+                 'WHERE t.roll_no = ?']
+        params = [str(roll_no)]
+        if course_id is not None:
+            query.append('AND t.course_id = ?')
+            params.append(str(course_id))
+        totals = [dict(row) for row in self._connect().execute(' '.join(query), params)]
+        for total in totals:
+            total['percentage'] = round(100 * total['sessionsPresent'] / total['sessionsHeld'], 2) \
+                if total['sessionsHeld'] else None
+        return totals
+
+    def student_history(self, roll_no, course_id=None, since=None, until=None, limit=None):
+        """Attendance records of one student, oldest first"""
+        query = ['SELECT session_id AS sessionId, course_id AS courseId, session_date AS date, name, status, '
+                 'confidence, timestamp FROM attendance WHERE roll_no = ?']
+        params = [str(roll_no)]
+        query, params = self._filter(query, params, course_id, since, until, 'session_date, session_id', limit)
+        return [dict(row) for row in self._connect().execute(' '.join(query), params)]
+
+    def course_history(self, course_id, since=None, until=None, limit=None):
+        """Sessions of one course with their records, oldest first"""
+        conn = self._connect()
+        query, params = self._filter(['SELECT id AS sessionId, session_date AS date, recorded_at AS recordedAt '
+                                      'FROM sessions WHERE 1 = 1'], [],
+                                     course_id, since, until, 'session_date, id', limit)
+        sessions = [dict(row, records=[]) for row in conn.execute(' '.join(query), params)]
+        if not sessions:
+            return []
+
+        by_id = {session['sessionId']: session for session in sessions}
+        # One range scan over the course's records instead of a query per session
+        query, params = self._filter(['SELECT session_id, roll_no AS rollNo, name, status, confidence, timestamp '
+                                      'FROM attendance WHERE 1 = 1'], [],
+                                     course_id, sessions[0]['date'], sessions[-1]['date'],
+                                     'session_date, session_id')
+        for row in conn.execute(' '.join(query), params):
+            session = by_id.get(row['session_id'])
+            if session is not None:
+                session['records'].append({key: row[key] for key in row.keys() if key != 'session_id'})
+        return sessions
+
+    @staticmethod
+    def _filter(query, params, course_id, since, until, order, limit=None):
+        if course_id is not None:
+            query.append('AND course_id = ?')
+            params.append(str(course_id))
+        if since:
+            query.append('AND session_date >= ?')
+            params.append(since)
+        if until:
+            query.append('AND session_date <= ?')
+            params.append(until)
+        query.append(f'ORDER BY {order}')
+        if limit:
+            query.append('LIMIT ?')
+            params.append(int(limit))
+        return query, params
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_attendance_store():
+    """Process-wide AttendanceStore, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AttendanceStore()
+            logger.info(f"Attendance store opened at {_store.path}")
+        return _store
@@ -0,0 +1,90 @@
+"""Measure the attendance store over a full academic year of records.
+
+Fills a temporary database with --courses courses meeting on --days days, each
+with --students students, using the same append_session call as
+/api/save-attendance. It then reports the save latency and the latency of
+student and course history queries and of the running-total lookup.
+
+Usage:
+    python benchmark_attendance.py [--courses 40] [--days 180] [--students 60]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from attendance_store import AttendanceStore
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(label, samples):
+    print(f"{label:<28} p50 {percentile(samples, 0.5) * 1000:7.2f} ms   "
+          f"p95 {percentile(samples, 0.95) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=40)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--students', type=int, default=60, help="students per course")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start_date = date(2025, 7, 1)
+    roll_numbers = [f"{21103000 + i}" for i in range(args.courses * args.students // 4 or 1)]
+    rosters = {f"CS{c:03d}": rng.sample(roll_numbers, min(args.students, len(roll_numbers)))
+               for c in range(args.courses)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = AttendanceStore(os.path.join(directory, 'attendance.db'))
+
+        saves = []
+        for day in range(args.days):
+            session_date = (start_date + timedelta(days=day)).isoformat()
+            for course_id, roster in rosters.items():
+                records = [{'rollNo': roll_no, 'name': roll_no, 'confidence': 90.0,
+                            'status': 'present' if rng.random() < 0.8 else 'absent'} for roll_no in roster]
+                t0 = time.perf_counter()
+                store.append_session(course_id, records, session_date)
+                saves.append(time.perf_counter() - t0)
+
+        rows = store._connect().execute('SELECT COUNT(*) FROM attendance').fetchone()[0]
+        size = os.path.getsize(store.path) / 1e6
+        print(f"{rows:,} attendance rows in {len(saves):,} sessions ({size:.1f} MB)")
+        report(f"save one class ({args.students} rows)", saves)
+
+        student_queries, course_queries, month_queries, totals_queries = [], [], [], []
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            store.student_history(rng.choice(roll_numbers))
+            student_queries.append(time.perf_counter() - t0)
+
+            course_id = rng.choice(list(rosters))
+            t0 = time.perf_counter()
+            store.student_history(rng.choice(rosters[course_id]), course_id=course_id)
+            course_queries.append(time.perf_counter() - t0)
+
+            month = start_date + timedelta(days=rng.randrange(max(1, args.days - 30)))
+            t0 = time.perf_counter()
+            store.course_history(course_id, month.isoformat(), (month + timedelta(days=30)).isoformat())
+            month_queries.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            store.student_totals(rng.choice(roll_numbers))
+            totals_queries.append(time.perf_counter() - t0)
+
+        report("student history (year)", student_queries)
+        report("student history (course)", course_queries)
+        report("course history (30 days)", month_queries)
+        report("student totals", totals_queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compare face detection backends and downscale factors on a sample frame.
+
+For every backend/scale pair it prints the median detection and encoding
+time and the number of faces found, to pick FACE_DETECTOR and
+DETECTION_SCALE (or per-request detector/detectionScale) for a camera.
+
+Usage:
+    python benchmark_detection.py classroom.jpg [--backends hog haar] [--scales 1 0.5 0.25]
+"""
+import argparse
+import os
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+from face_detection import FaceDetector, BACKENDS
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+
+
+def median_ms(fn, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('image')
+    parser.add_argument('--backends', nargs='+', default=['hog', 'haar'], choices=BACKENDS)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 0.5, 0.25])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--dnn-model-dir', default=MODEL_DIR)
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        parser.error(f"Cannot read image {args.image}")
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    print(f"Frame {frame.shape[1]}x{frame.shape[0]}")
+    print(f"{'backend':>8} {'scale':>6} {'faces':>6} {'detect ms':>10} {'encode ms':>10}")
+
+    for backend in args.backends:
+        for scale in args.scales:
+            try:
+                detector = FaceDetector(backend, scale, dnn_model_dir=args.dnn_model_dir)
+            except (ValueError, FileNotFoundError) as e:
+                print(f"{backend:>8} {scale:>6}  skipped: {e}")
+                continue
+            detect_ms, boxes = median_ms(lambda: detector.detect(rgb_frame), args.repeats)
+            encode_ms, _ = median_ms(lambda: face_recognition.face_encodings(rgb_frame, boxes), args.repeats)
+            print(f"{backend:>8} {scale:>6} {len(boxes):>6} {detect_ms:>10.1f} {encode_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Compare the SVM, centroid and ANN recognition engines.
+
+For each roster size it reports:
+  - enrollment cost: time to make one new student recognizable
+    (SVM: refit scaler + PCA + SVC on everything; centroid: add one centroid;
+    ann: add to the side buffer, plus the background IVF rebuild time)
+  - recognition latency for a 40-face frame
+  - accuracy on held-out samples of enrolled students, and the share of
+    never-enrolled faces correctly rejected as unknown
+
+Encodings are synthetic (per-student centres with face_recognition-like
+spread) unless --store is given, in which case the embedding store is used.
+
+Usage:
+    python benchmark_engines.py [--students 20 100] [--samples 50] [--store]
+                                [--engines svm centroid ann]
+
+The SVM refit gets very slow past a few hundred students; use e.g.
+--students 10000 --engines centroid ann for large rosters.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from ann_index import IVFIndex
+from embedding_store import EmbeddingStore
+from recognition_engines import CentroidEngine, AnnEngine, CONFIDENCE_THRESHOLD
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
+FRAME_FACES = 40
+
+
+def synthetic_students(n_students, n_samples, rng):
+    # Centres ~1.0 apart-ish and samples ~0.35 from their centre, like dlib encodings
+    centres = rng.normal(0, 0.09, (n_students, 128))
+    X = np.repeat(centres, n_samples, axis=0) + rng.normal(0, 0.03, (n_students * n_samples, 128))
+    y = np.repeat(np.array([f"S{i:05d}" for i in range(n_students)]), n_samples)
+    return X, y
+
+
+def split(X, y, rng, holdout=0.2):
+    order = rng.permutation(len(X))
+    cut = int(len(X) * (1 - holdout))
+    return X[order[:cut]], y[order[:cut]], X[order[cut:]], y[order[cut:]]
+
+
+def fit_svm(X, y):
+    scaler = StandardScaler()
+    pca = PCA(n_components=min(50, len(X), X.shape[1]))
+    model = SVC(kernel='linear', probability=True, random_state=42)
+    model.fit(pca.fit_transform(scaler.fit_transform(X)), y)
+    return scaler, pca, model
+
+
+def svm_predict(svm, X):
+    scaler, pca, model = svm
+    proba = model.predict_proba(pca.transform(scaler.transform(X)))
+    best = proba.argmax(axis=1)
+    return model.classes_[best], proba[np.arange(len(best)), best]
+
+
+def score(predict, X_known, y_known, X_unknown):
+    labels, confidences = predict(X_known)
+    accepted = confidences >= CONFIDENCE_THRESHOLD
+    accuracy = np.mean(accepted & (labels == y_known))
+    _, unknown_conf = predict(X_unknown)
+    rejection = np.mean(unknown_conf < CONFIDENCE_THRESHOLD)
+    return accuracy, rejection
+
+
+def median_ms(fn, repeats=10):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def run(X, y, X_unknown, rng, engines):
+    X_train, y_train, X_test, y_test = split(X, y, rng)
+    newcomer = y_train[0]
+    enrolled = y_train != newcomer
+    frame = X_test[rng.integers(0, len(X_test), FRAME_FACES)]
+    results = {}
+
+    if 'svm' in engines:
+        # SVM: a new student means a full refit
+        start = time.perf_counter()
+        svm = fit_svm(X_train, y_train)
+        svm_enroll = time.perf_counter() - start
+        results['svm'] = (f"{svm_enroll * 1000:.2f}", median_ms(lambda: svm_predict(svm, frame)),
+                          *score(lambda X_: svm_predict(svm, X_), X_test, y_test, X_unknown))
+
+    if 'centroid' in engines:
+        # Centroid: fit everyone else once, then time adding the newcomer alone
+        centroid = CentroidEngine()
+        centroid.fit(X_train[enrolled], y_train[enrolled])
+        start = time.perf_counter()
+        centroid.add(newcomer, X_train[~enrolled])
+        centroid_enroll = time.perf_counter() - start
+        # Calibrate on the full roster for a fair accuracy comparison
+        centroid.fit(X_train, y_train)
+        results['centroid'] = (f"{centroid_enroll * 1000:.2f}", median_ms(lambda: centroid.predict(frame)),
+                               *score(centroid.predict, X_test, y_test, X_unknown))
+
+    if 'ann' in engines:
+        # ANN: newcomer goes to the side buffer at once; the index rebuild runs in the background
+        ann = AnnEngine()
+        ann.set_index(IVFIndex.build(X_train[enrolled], y_train[enrolled]))
+        start = time.perf_counter()
+        ann.add(newcomer, X_train[~enrolled])
+        ann_enroll = time.perf_counter() - start
+        start = time.perf_counter()
+        ann.set_index(IVFIndex.build(X_train, y_train))
+        rebuild = time.perf_counter() - start
+        results['ann'] = (f"{ann_enroll * 1000:.2f}+{rebuild * 1000:.0f}", median_ms(lambda: ann.predict(frame)),
+                          *score(ann.predict, X_test, y_test, X_unknown))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--store', action='store_true', help="use the embedding store instead of synthetic data")
+    parser.add_argument('--engines', nargs='+', default=['svm', 'centroid', 'ann'],
+                        choices=['svm', 'centroid', 'ann'])
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    print(f"{'students':>8} {'engine':>9} {'enroll ms':>12} {f'{FRAME_FACES}-face ms':>11} "
+          f"{'accuracy':>9} {'rejected':>9}")
+
+    if args.store:
+        X, y = EmbeddingStore(DATASET_DIR).load()
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+        # Hold out one student entirely to measure open-set rejection
+        outsider = np.unique(y)[-1]
+        datasets = [(len(np.unique(y)) - 1, X[y != outsider], y[y != outsider], X[y == outsider])]
+    else:
+        datasets = []
+        for n_students in args.students:
+            X, y = synthetic_students(n_students, args.samples, rng)
+            X_unknown, _ = synthetic_students(20, 5, rng)
+            datasets.append((n_students, X, y, X_unknown))
+
+    for n_students, X, y, X_unknown in datasets:
+        for engine, (enroll_ms, frame_ms, accuracy, rejection) in run(X, y, X_unknown, rng, args.engines).items():
+            print(f"{n_students:>8} {engine:>9} {enroll_ms:>12} {frame_ms:>11.2f} "
+                  f"{accuracy:>9.3f} {rejection:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark per-frame classification latency against the number of faces.
+
+Compares the old per-face loop (scaler/PCA/predict_proba/predict per face)
+with the batched pipeline used by /api/recognize_multiple.
+
+Usage:
+    python benchmark_recognition.py [--faces 1 5 10 20 40 80] [--repeats 20]
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+
+from embedding_store import EmbeddingStore
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
+
+
+def load_pipeline():
+    model = joblib.load(os.path.join(MODEL_DIR, 'svm_face_model.pkl'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+    pca = joblib.load(os.path.join(MODEL_DIR, 'pca.pkl'))
+    return model, scaler, pca
+
+
+def sample_encodings(n_faces, rng):
+    """Draw encodings from the embedding store (with a little noise), or random ones if it is empty"""
+    pool, _ = EmbeddingStore(DATASET_DIR).load()
+
+    if len(pool):
+        picks = np.asarray(pool[rng.integers(0, len(pool), n_faces)], dtype=np.float64)
+        return picks + rng.normal(0, 0.01, picks.shape)
+    return rng.normal(0, 0.1, (n_faces, 128))
+
+
+def classify_per_face(model, scaler, pca, encodings):
+    results = []
+    for encoding in encodings:
+        reduced = pca.transform(scaler.transform(encoding.reshape(1, -1)))
+        proba = model.predict_proba(reduced)[0]
+        results.append((model.predict(reduced)[0], max(proba)))
+    return results
+
+
+def classify_batched(model, scaler, pca, encodings):
+    proba = model.predict_proba(pca.transform(scaler.transform(encodings)))
+    best = proba.argmax(axis=1)
+    return model.classes_[best], proba[np.arange(len(best)), best]
+
+
+def time_call(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--faces', type=int, nargs='+', default=[1, 5, 10, 20, 40, 80])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    model, scaler, pca = load_pipeline()
+    rng = np.random.default_rng(42)
+
+    print(f"{'faces':>6} {'per-face ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for n_faces in args.faces:
+        encodings = sample_encodings(n_faces, rng)
+        loop_ms = time_call(lambda: classify_per_face(model, scaler, pca, encodings), args.repeats)
+        batch_ms = time_call(lambda: classify_batched(model, scaler, pca, encodings), args.repeats)
+        print(f"{n_faces:>6} {loop_ms:>12.2f} {batch_ms:>11.2f} {loop_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
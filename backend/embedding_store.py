@@ -0,0 +1,134 @@
+import os
+import threading
+import logging
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 128
+
+
+class EmbeddingStore:
+    """Append-only store of face encodings
+
+    All encodings live in one contiguous float32 matrix (embeddings.f32) with a
+    parallel label index (labels.txt, one roll number per row). Appends only
+    ever add bytes to the end of both files, and reads memory-map the matrix so
+    retraining does not copy or parse per-sample files.
+    """
+
+    def __init__(self, directory, dim=EMBEDDING_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.matrix_path = os.path.join(directory, 'embeddings.f32')
+        self.labels_path = os.path.join(directory, 'labels.txt')
+        self._lock = threading.Lock()
+        self._labels = []
+        self._counts = Counter()
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    @property
+    def _row_bytes(self):
+        return self.dim * np.dtype(np.float32).itemsize
+
+    def _open(self, repair=True):
+        """Load the label index and repair a torn append left by a crash"""
+        labels = []
+        if os.path.exists(self.labels_path):
+            with open(self.labels_path, 'r') as f:
+                text = f.read()
+            labels = text.splitlines()
+            if text and not text.endswith('\n'):
+                # Half-written last label
+                labels.pop()
+
+        matrix_bytes = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        rows = matrix_bytes // self._row_bytes
+
+        n = min(rows, len(labels))
+        if repair and (matrix_bytes != n * self._row_bytes or len(labels) != n):
+            logger.warning(f"Embedding store out of sync ({rows} rows, {len(labels)} labels); truncating to {n}")
+            labels = labels[:n]
+            with open(self.matrix_path, 'ab') as f:
+                f.truncate(n * self._row_bytes)
+            with open(self.labels_path, 'w') as f:
+                f.writelines(f"{label}\n" for label in labels)
+
+        self._labels = labels[:n]
+        self._counts = Counter(self._labels)
+
+    def reload(self):
+        """Re-read the label index after another process appended
+
+        Never repairs: a row whose label is not written yet is simply ignored.
+        """
+        with self._lock:
+            self._open(repair=False)
+
+    def append(self, label, encodings):
+        """Append one or more encodings for label; returns the new sample count for label"""
+        label = str(label)
+        if not label or '\n' in label:
+            raise ValueError(f"Invalid label: {label!r}")
+
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if not len(encodings):
+            return self.count(label)
+
+        with self._lock:
+            # Matrix first, labels second: a crash in between leaves an extra
+            # row that _open() trims, never a label without its encoding
+            with open(self.matrix_path, 'ab') as f:
+                f.write(encodings.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.labels_path, 'a') as f:
+                f.write(f"{label}\n" * len(encodings))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._labels.extend([label] * len(encodings))
+            self._counts[label] += len(encodings)
+            return self._counts[label]
+
+    def load(self):
+        """Return (X, y): a read-only memory map of all encodings and their labels"""
+        with self._lock:
+            n = len(self._labels)
+            y = np.array(self._labels[:n])
+        if n == 0:
+            return np.empty((0, self.dim), dtype=np.float32), y
+        X = np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(n, self.dim))
+        return X, y
+
+    def get(self, label):
+        """Return the encodings stored for one label"""
+        X, y = self.load()
+        return np.asarray(X[y == str(label)])
+
+    def count(self, label):
+        return self._counts.get(str(label), 0)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def total(self):
+        return len(self._labels)
+
+    @property
+    def students(self):
+        return len(self._counts)
+
+    def clear(self):
+        """Delete every stored encoding"""
+        with self._lock:
+            for path in (self.matrix_path, self.labels_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._labels = []
+            self._counts = Counter()
@@ -0,0 +1,97 @@
+import os
+import threading
+import logging
+
+import cv2
+import face_recognition
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('hog', 'cnn', 'haar', 'dnn')
+
+# OpenCV's ResNet-10 SSD face detector (deploy.prototxt + caffemodel)
+DNN_PROTOTXT = 'deploy.prototxt'
+DNN_WEIGHTS = 'res10_300x300_ssd_iter_140000.caffemodel'
+DNN_INPUT_SIZE = (300, 300)
+DNN_MEAN = (104.0, 177.0, 123.0)
+
+
+class FaceDetector:
+    """Face detection stage with selectable backends and optional downscaling
+
+    hog and cnn use face_recognition (dlib); haar and dnn use OpenCV. The frame
+    is resized by `scale` before detection and the boxes are mapped back to the
+    full-resolution frame, so encodings are still computed on full-size crops.
+    Boxes are (top, right, bottom, left), like face_recognition.face_locations.
+    """
+
+    def __init__(self, backend='hog', scale=1.0, upsample=1, dnn_model_dir=None, dnn_confidence=0.5):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown face detector '{backend}', expected one of {', '.join(BACKENDS)}")
+        if not 0 < scale <= 1:
+            raise ValueError("Detection scale must be in (0, 1]")
+        self.backend = backend
+        self.scale = scale
+        self.upsample = upsample
+        self.dnn_model_dir = dnn_model_dir
+        self.dnn_confidence = dnn_confidence
+        # OpenCV classifiers/nets are not safe to share between threads
+        self._local = threading.local()
+
+        if backend == 'dnn':
+            for file_name in (DNN_PROTOTXT, DNN_WEIGHTS):
+                if not os.path.exists(os.path.join(dnn_model_dir or '', file_name)):
+                    raise FileNotFoundError(f"DNN face detector needs {file_name} in {dnn_model_dir}")
+
+    def _haar(self):
+        if not hasattr(self._local, 'haar'):
+            self._local.haar = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'))
+        return self._local.haar
+
+    def _dnn(self):
+        if not hasattr(self._local, 'dnn'):
+            self._local.dnn = cv2.dnn.readNetFromCaffe(
+                os.path.join(self.dnn_model_dir, DNN_PROTOTXT),
+                os.path.join(self.dnn_model_dir, DNN_WEIGHTS))
+        return self._local.dnn
+
+    def _detect_small(self, image):
+        if self.backend in ('hog', 'cnn'):
+            return face_recognition.face_locations(
+                image, number_of_times_to_upsample=self.upsample, model=self.backend)
+
+        if self.backend == 'haar':
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            boxes = self._haar().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))
+            return [(y, x + w, y + h, x) for (x, y, w, h) in boxes]
+
+        # dnn
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.cvtColor(image, cv2.COLOR_RGB2BGR), 1.0, DNN_INPUT_SIZE, DNN_MEAN)
+        net = self._dnn()
+        net.setInput(blob)
+        detections = net.forward()[0, 0]
+        boxes = []
+        for detection in detections:
+            if detection[2] < self.dnn_confidence:
+                continue
+            left, top, right, bottom = detection[3:7] * [width, height, width, height]
+            boxes.append((int(top), int(right), int(bottom), int(left)))
+        return boxes
+
+    def detect(self, rgb_frame):
+        """Return face boxes in full-resolution coordinates"""
+        height, width = rgb_frame.shape[:2]
+        image = rgb_frame
+        if self.scale < 1:
+            image = cv2.resize(rgb_frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        boxes = []
+        for top, right, bottom, left in self._detect_small(image):
+            top, right, bottom, left = (int(round(v / self.scale)) for v in (top, right, bottom, left))
+            top, left = max(top, 0), max(left, 0)
+            bottom, right = min(bottom, height), min(right, width)
+            if bottom > top and right > left:
+                boxes.append((top, right, bottom, left))
+        return boxes
@@ -0,0 +1,195 @@
+import itertools
+import threading
+import time
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+MIN_TRACK_POINTS = 3
+
+
+def iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    intersection = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class Track:
+    """One face followed across frames of a stream"""
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.points = None
+        self.missed = 0
+        self.identify_attempts = 0
+        self.name = "Unknown"
+        self.roll_no = None
+        self.confidence = 0.0
+
+    @property
+    def identified(self):
+        return self.roll_no is not None
+
+    def as_dict(self):
+        top, right, bottom, left = self.box
+        return {
+            'trackId': self.id,
+            'name': self.name,
+            'rollNo': self.roll_no,
+            'confidence': float(self.confidence),
+            'x': int(left),
+            'y': int(top),
+            'width': int(right - left),
+            'height': int(bottom - top)
+        }
+
+
+class FaceTracker:
+    """Per-stream face tracker: full detection on keyframes, optical flow in between
+
+    Every keyframe_interval-th frame runs the detector. Detections are matched
+    to existing tracks by IoU; only detections that start a new track (and
+    tracks still unidentified, up to max_identify_attempts) are encoded and
+    classified. On the frames in between, each track's box is moved by the
+    median Lucas-Kanade flow of feature points inside it, with no detection or
+    encoding at all. process() returns only what changed as events, plus the
+    current boxes.
+    """
+
+    def __init__(self, keyframe_interval=10, iou_threshold=0.3, max_missed=2, max_identify_attempts=3):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.max_identify_attempts = max_identify_attempts
+        self.tracks = []
+        self.frame_index = 0
+        self.prev_gray = None
+        self._ids = itertools.count(1)
+
+    def _seed_points(self, gray, track):
+        top, right, bottom, left = track.box
+        mask = np.zeros_like(gray)
+        mask[top:bottom, left:right] = 255
+        track.points = cv2.goodFeaturesToTrack(gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+
+    def _follow(self, gray):
+        height, width = gray.shape[:2]
+        for track in self.tracks:
+            if track.points is None or len(track.points) < MIN_TRACK_POINTS:
+                continue
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, track.points, None, **LK_PARAMS)
+            ok = status.reshape(-1) == 1
+            if ok.sum() < MIN_TRACK_POINTS:
+                track.points = None
+                continue
+            dx, dy = np.median(new_points[ok] - track.points[ok], axis=0).reshape(2)
+            top, right, bottom, left = track.box
+            top, bottom = int(round(top + dy)), int(round(bottom + dy))
+            left, right = int(round(left + dx)), int(round(right + dx))
+            track.box = (max(top, 0), min(right, width), min(bottom, height), max(left, 0))
+            track.points = new_points[ok].reshape(-1, 1, 2)
+
+    def _match(self, boxes):
+        """Greedy IoU matching; returns (matches, unmatched box indices, unmatched tracks)"""
+        pairs = sorted(((iou(track.box, box), t, b)
+                        for t, track in enumerate(self.tracks) for b, box in enumerate(boxes)), reverse=True)
+        matched_tracks, matched_boxes, matches = set(), set(), []
+        for score, t, b in pairs:
+            if score < self.iou_threshold:
+                break
+            if t in matched_tracks or b in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+            matches.append((self.tracks[t], boxes[b]))
+        new_boxes = [box for b, box in enumerate(boxes) if b not in matched_boxes]
+        stale = [track for t, track in enumerate(self.tracks) if t not in matched_tracks]
+        return matches, new_boxes, stale
+
+    def process(self, frame, detect, encode, identify, timer=None):
+        """Advance the tracker by one BGR frame
+
+        detect(rgb) -> boxes, encode(rgb, boxes) -> encodings and
+        identify(encodings) -> [{'name', 'rollNo', 'confidence'}] are supplied by
+        the caller; timer, if given, provides stage(name) context managers.
+        """
+        stage = timer.stage if timer else (lambda name: nullcontext())
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        keyframe = self.frame_index % self.keyframe_interval == 0
+        events = []
+
+        if keyframe:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with stage('detect'):
+                boxes = detect(rgb_frame)
+            matches, new_boxes, stale = self._match(boxes)
+
+            for track, box in matches:
+                track.box = box
+                track.missed = 0
+
+            for track in stale:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    self.tracks.remove(track)
+                    events.append({'type': 'track_lost', 'trackId': track.id})
+
+            new_tracks = [Track(next(self._ids), box) for box in new_boxes]
+            self.tracks.extend(new_tracks)
+
+            # Encode only faces whose identity is not known yet
+            to_identify = new_tracks + [
+                track for track, _ in matches
+                if not track.identified and track.identify_attempts < self.max_identify_attempts]
+            if to_identify:
+                with stage('encode'):
+                    encodings = encode(rgb_frame, [track.box for track in to_identify])
+                with stage('classify'):
+                    identities = identify(encodings) if len(encodings) else []
+                for track, identity in zip(to_identify, identities):
+                    track.identify_attempts += 1
+                    was_identified = track.identified
+                    track.name, track.roll_no, track.confidence = (
+                        identity['name'], identity['rollNo'], identity['confidence'])
+                    if track in new_tracks:
+                        events.append(dict(track.as_dict(), type='track_new'))
+                    elif track.identified and not was_identified:
+                        events.append(dict(track.as_dict(), type='track_identified'))
+
+            for track in self.tracks:
+                self._seed_points(gray, track)
+        else:
+            with stage('track'):
+                self._follow(gray)
+
+        self.prev_gray = gray
+        result = {
+            'frame': self.frame_index,
+            'keyframe': keyframe,
+            'events': events,
+            'tracks': [track.as_dict() for track in self.tracks]
+        }
+        self.frame_index += 1
+        return result
+
+
+class StreamSession:
+    """State kept for one attendance stream between frames"""
+
+    def __init__(self, session_id, tracker, detector):
+        self.id = session_id
+        self.tracker = tracker
+        self.detector = detector
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # rollNo -> best confidence seen during the session
+        self.present = {}
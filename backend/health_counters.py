@@ -0,0 +1,65 @@
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class HealthCounters:
+    """In-memory counters behind /api/health
+
+    The endpoints that change the dataset update the counters as they go, so a
+    health probe only copies a dict. Every interval seconds a background thread
+    runs scan_fn (the full count against disk and the registry) and overwrites
+    the counters with its result, logging any drift. This covers changes made
+    by other processes and updates that were missed.
+    """
+
+    def __init__(self, scan_fn, interval=300.0):
+        self.scan_fn = scan_fn
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._values = {}
+        self._reconciled_at = None
+        self._thread = None
+
+    def set(self, **values):
+        with self._lock:
+            self._values.update(values)
+
+    def add(self, name, delta=1):
+        with self._lock:
+            self._values[name] = max(0, self._values.get(name, 0) + delta)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values, counters_reconciled_at=self._reconciled_at)
+
+    def reconcile(self):
+        """Recount with scan_fn and reset the counters; returns {name: (counted, cached)} for every mismatch"""
+        start = time.perf_counter()
+        scanned = self.scan_fn()
+        with self._lock:
+            drift = {name: (value, self._values.get(name)) for name, value in scanned.items()
+                     if self._values.get(name) != value}
+            self._values.update(scanned)
+            self._reconciled_at = datetime.now().isoformat()
+        if drift and any(cached is not None for _, cached in drift.values()):
+            logger.warning(f"Health counters drifted from disk (counted, cached): {drift}")
+        logger.debug(f"Health counters reconciled in {time.perf_counter() - start:.3f}s")
+        return drift
+
+    def ensure_started(self):
+        """Start the reconcile thread unless it is already running"""
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._loop, name='health-reconcile', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.error(f"Error reconciling health counters: {e}")
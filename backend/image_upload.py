@@ -0,0 +1,147 @@
+import base64
+import binascii
+import logging
+import tempfile
+
+import cv2
+import numpy as np
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+
+def decode_base64_image(image_data):
+    """Decode a base64 image, with or without a data-URL prefix"""
+    try:
+        comma = image_data.find(',')
+        if comma != -1:
+            image_data = image_data[comma + 1:]
+        return decode_image_buffer(base64.b64decode(image_data))
+    except (binascii.Error, ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Error decoding base64 image: {e}")
+        return None
+
+
+def decode_image_buffer(buffer):
+    """Decode encoded image bytes from any buffer object without copying them"""
+    array = np.frombuffer(buffer, np.uint8)
+    try:
+        return cv2.imdecode(array, cv2.IMREAD_COLOR) if array.size else None
+    except cv2.error as e:
+        logger.error(f"Error decoding image: {e}")
+        return None
+    finally:
+        # An upload's BytesIO cannot be closed while its buffer is still exported
+        del array
+        if isinstance(buffer, memoryview):
+            buffer.release()
+
+
+def upload_buffer(upload):
+    """Contents of a multipart file upload, as a view of the in-memory stream when possible"""
+    stream = upload.stream
+    if hasattr(stream, 'getbuffer'):
+        return stream.getbuffer()
+    stream.seek(0)
+    return stream.read()
+
+
+def read_image_request():
+    """Return (fields, image) for an image upload in any supported format
+
+    - image/* body: the raw encoded image, other fields from the query string
+    - multipart/form-data: an `image` file part, fields from the form and query string
+    - JSON: {"image": <base64 or data-URL>, ...} as before
+    image is a buffer (or base64 string for JSON) to pass to decode_image, or
+    None when the request has no image.
+    """
+    if request.mimetype and request.mimetype.startswith('image/'):
+        image = request.get_data(cache=False)
+        return request.args.to_dict(), image or None
+
+    if request.mimetype == 'multipart/form-data':
+        fields = request.args.to_dict()
+        fields.update(request.form.to_dict())
+        upload = request.files.get('image')
+        return fields, upload_buffer(upload) if upload else None
+
+    data = request.get_json(silent=True) or {}
+    return data, data.get('image')
+
+
+def read_burst_request():
+    """Return (fields, frames, video) for a burst enrollment upload
+
+    - video/* body: the raw clip, other fields from the query string
+    - multipart/form-data: a `video` file part or several `frames` file parts
+    - JSON: {"frames": [<base64 or data-URL>, ...]} or {"video": <base64 or data-URL>}
+    frames is a list of images to pass to decode_image; video is the encoded
+    clip as a buffer, or None.
+    """
+    if request.mimetype and request.mimetype.startswith('video/'):
+        return request.args.to_dict(), [], request.get_data(cache=False) or None
+
+    if request.mimetype == 'multipart/form-data':
+        fields = request.args.to_dict()
+        fields.update(request.form.to_dict())
+        video = request.files.get('video')
+        frames = [upload_buffer(upload) for upload in request.files.getlist('frames')]
+        return fields, frames, upload_buffer(video) if video else None
+
+    data = request.get_json(silent=True) or {}
+    frames = data.get('frames') or []
+    video = data.get('video')
+    if isinstance(video, str):
+        try:
+            video = base64.b64decode(video[video.find(',') + 1:])
+        except (binascii.Error, ValueError) as e:
+            logger.error(f"Error decoding base64 video: {e}")
+            video = b''
+    return data, frames if isinstance(frames, list) else [], video
+
+
+def sample_video_frames(buffer, count):
+    """Decode up to count frames spread evenly over an encoded video clip"""
+    # OpenCV only reads videos from a path
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(buffer)
+        f.flush()
+        if isinstance(buffer, memoryview):
+            buffer.release()
+        capture = cv2.VideoCapture(f.name)
+        try:
+            total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total <= 0:
+                # Unknown length: decode the whole clip, then pick from it
+                frames = []
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    frames.append(frame)
+                keep = np.unique(np.linspace(0, len(frames) - 1, count).astype(int)) if frames else []
+                return [frames[i] for i in keep]
+
+            keep = set(np.linspace(0, total - 1, min(count, total)).astype(int).tolist())
+            frames = []
+            for index in range(max(keep) + 1):
+                # grab() skips the colour conversion for frames that are not kept
+                if not capture.grab():
+                    break
+                if index in keep:
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        frames.append(frame)
+            return frames
+        finally:
+            capture.release()
+
+
+def decode_image(image):
+    """Decode what read_image_request returned into a BGR frame, or None if invalid"""
+    if isinstance(image, np.ndarray):
+        # Already a decoded frame (sampled from a video)
+        return image
+    if isinstance(image, str):
+        return decode_base64_image(image)
+    return decode_image_buffer(image)
@@ -0,0 +1,108 @@
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the admission queue is full"""
+
+
+def _run_task(refresh, task, args):
+    refresh()
+    return task(*args)
+
+
+class InferencePool:
+    """Process pool for the CPU-bound detect/encode/classify work of the face API
+
+    Workers are forked from the initialized API process and run `initializer`
+    once (loading the models); before each task `refresh` lets a worker pick up
+    a model published since. At most workers + queue_size tasks are admitted at
+    once; further submissions raise PoolSaturated instead of queueing without
+    bound, so callers can answer 503.
+    """
+
+    def __init__(self, workers, queue_size, initializer, refresh):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._initializer = initializer
+        self._refresh = refresh
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._executor = None
+        self._start()
+
+    def _start(self):
+        old, self._executor = self._executor, ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=self._initializer)
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=True)
+        # The first submission forks every worker at once
+        self._executor.submit(self._refresh).result()
+        logger.info(f"Inference pool started with {self.workers} workers, queue size {self.queue_size}")
+
+    def _restart(self, broken):
+        """Replace a broken executor once, however many requests noticed it"""
+        with self._restart_lock:
+            if self._executor is broken:
+                self._start()
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def submit(self, task, *args):
+        """Run task(*args) in a worker and return its result
+
+        Raises PoolSaturated when the pool is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturated(f"All {self.workers} inference workers busy and {self.queue_size} requests queued")
+        with self._lock:
+            self._in_flight += 1
+
+        executor = self._executor
+        try:
+            try:
+                future = executor.submit(_run_task, self._refresh, task, args)
+            except BrokenProcessPool:
+                logger.error("Inference pool broken; restarting it")
+                self._restart(executor)
+                executor = self._executor
+                future = executor.submit(_run_task, self._refresh, task, args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died mid-task (e.g. killed for memory); replace the pool for later requests
+            logger.error("Inference worker died; restarting the pool")
+            self._restart(executor)
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queueSize': self.queue_size,
+                'inFlight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
@@ -0,0 +1,76 @@
+"""One-time import of the legacy dataset/<rollNo>/<n>.npy tree into the embedding store.
+
+Students already present in the store are skipped, so the tool can be re-run
+safely. Pass --remove-legacy to delete the per-sample folders once imported;
+a folder none of whose samples could be imported is always kept. app.py runs
+the import itself when it starts with an empty store and legacy folders.
+
+Usage:
+    python migrate_dataset.py [--dataset-dir DIR] [--remove-legacy]
+"""
+import argparse
+import os
+import shutil
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, EMBEDDING_DIM
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
+
+
+def sample_index(file_name):
+    stem = os.path.splitext(file_name)[0]
+    return int(stem) if stem.isdigit() else float('inf')
+
+
+def has_legacy_folders(dataset_dir):
+    return os.path.isdir(dataset_dir) and any(
+        os.path.isdir(os.path.join(dataset_dir, d)) for d in os.listdir(dataset_dir))
+
+
+def migrate(dataset_dir, remove_legacy=False, store=None):
+    """Import every legacy student folder into store; returns (students, samples) imported"""
+    store = store if store is not None else EmbeddingStore(dataset_dir)
+    imported_students, imported_samples = 0, 0
+
+    for student_id in sorted(os.listdir(dataset_dir)):
+        student_path = os.path.join(dataset_dir, student_id)
+        if not os.path.isdir(student_path):
+            continue
+
+        if store.count(student_id):
+            print(f"  {student_id}: already in store, skipped")
+        else:
+            files = sorted((f for f in os.listdir(student_path) if f.endswith('.npy')), key=sample_index)
+            encodings = [np.load(os.path.join(student_path, f)) for f in files]
+            encodings = [e for e in encodings if e.shape == (EMBEDDING_DIM,)]
+            if encodings:
+                store.append(student_id, np.stack(encodings))
+                imported_students += 1
+                imported_samples += len(encodings)
+            print(f"  {student_id}: {len(encodings)} samples")
+
+        if remove_legacy:
+            if store.count(student_id):
+                shutil.rmtree(student_path)
+            else:
+                print(f"  {student_id}: nothing imported, folder kept")
+
+    print(f"Imported {imported_samples} samples for {imported_students} students "
+          f"({store.total} samples, {store.students} students in store)")
+    return imported_students, imported_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset-dir', default=DATASET_DIR)
+    parser.add_argument('--remove-legacy', action='store_true',
+                        help="delete dataset/<rollNo>/ folders after importing them")
+    args = parser.parse_args()
+    migrate(args.dataset_dir, args.remove_legacy)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+import logging
+from collections import namedtuple
+
+import joblib
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+
+# The scaler -> PCA -> SVM pipeline is published as one immutable object.
+# Retraining builds a new one off to the side and swaps the reference, so a
+# request always sees a consistent set of models.
+FacePipeline = namedtuple('FacePipeline', ['model', 'scaler', 'pca', 'target_names'])
+ARTIFACTS = {
+    'model': 'svm_face_model.pkl',
+    'scaler': 'scaler.pkl',
+    'pca': 'pca.pkl',
+    'target_names': 'target_names.pkl'
+}
+
+
+def empty_pipeline():
+    return FacePipeline(model=None, scaler=StandardScaler(), pca=PCA(n_components=50), target_names=None)
+
+
+class ModelRegistry:
+    """The one copy of the SVM face pipeline in this process
+
+    Nothing is read from disk until the pipeline is first asked for. The
+    loaded pipeline is identified by a checksum of its artifact files.
+    publish() writes a new set of artifacts and swaps it in for every caller
+    at once. refresh() picks up artifacts written by another process: it
+    compares file sizes and mtimes first, and only re-hashes and reloads when
+    they have changed.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._signature = None
+        self.version = None
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    def _path(self, name):
+        return os.path.join(self.model_dir, ARTIFACTS[name])
+
+    def _signature_now(self):
+        signature = []
+        for name in ARTIFACTS:
+            try:
+                stat = os.stat(self._path(name))
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _checksum(self):
+        digest = hashlib.sha256()
+        for name in ARTIFACTS:
+            path = self._path(name)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            digest.update(b'\0')
+        return digest.hexdigest()[:16]
+
+    def _load(self):
+        """Read the artifacts (retrying if they change underneath); caller holds the lock"""
+        for _ in range(3):
+            signature = self._signature_now()
+            version = self._checksum()
+            if version == self.version and self._pipeline is not None:
+                self._signature = signature
+                return self._pipeline
+            try:
+                parts = {name: joblib.load(self._path(name)) if os.path.exists(self._path(name)) else None
+                         for name in ARTIFACTS}
+            except Exception as e:
+                logger.error(f"Error loading models: {e}")
+                parts = {}
+            if self._signature_now() == signature:
+                break
+            logger.info("Model files changed while loading; reading them again")
+
+        pipeline = FacePipeline(
+            model=parts.get('model'),
+            scaler=parts['scaler'] if parts.get('scaler') is not None else StandardScaler(),
+            pca=parts['pca'] if parts.get('pca') is not None else PCA(n_components=50),
+            target_names=parts.get('target_names'))
+        self._pipeline, self._signature, self.version = pipeline, signature, version
+        logger.info(f"Face models loaded (version {version}, trained: {pipeline.model is not None})")
+        return pipeline
+
+    def get(self):
+        """The current pipeline, loading it on first use"""
+        pipeline = self._pipeline
+        if pipeline is None:
+            with self._lock:
+                pipeline = self._pipeline or self._load()
+        return pipeline
+
+    def refresh(self):
+        """Reload if another process wrote new artifacts; returns the current pipeline"""
+        if self._pipeline is not None and self._signature_now() == self._signature:
+            return self._pipeline
+        with self._lock:
+            return self._load()
+
+    def reload(self):
+        """Unconditionally re-read the artifacts"""
+        with self._lock:
+            self._pipeline = None
+            self.version = None
+            return self._load()
+
+    def publish(self, pipeline):
+        """Write pipeline's artifacts (each atomically) and make it the current pipeline"""
+        with self._lock:
+            for name, obj in pipeline._asdict().items():
+                tmp_path = f"{self._path(name)}.tmp"
+                joblib.dump(obj, tmp_path)
+                os.replace(tmp_path, self._path(name))
+            self._pipeline = pipeline
+            self._signature = self._signature_now()
+            self.version = self._checksum()
+        return self.version
+
+    def clear(self):
+        """Delete the artifacts and fall back to an untrained pipeline"""
+        with self._lock:
+            for name in ARTIFACTS:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self._pipeline = empty_pipeline()
+            self._signature = self._signature_now()
+            self.version = self._checksum()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'loaded': self.loaded,
+            'trained': self._pipeline is not None and self._pipeline.model is not None
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Process-wide ModelRegistry shared by every recognition path in app.py"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
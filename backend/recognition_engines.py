@@ -0,0 +1,191 @@
+import threading
+import logging
+
+import numpy as np
+
+from ann_index import squared_distances
+
+logger = logging.getLogger(__name__)
+
+# Confidence at which the API accepts a match (same cut-off as the SVM path)
+CONFIDENCE_THRESHOLD = 0.6
+# face_recognition's own "same person" tolerance; a calibrated threshold never exceeds it
+MAX_DISTANCE = 0.6
+DEFAULT_DISTANCE = 0.5
+# Faces scored per distance-matrix block, to bound memory on very large rosters
+PREDICT_CHUNK = 1024
+
+
+def distance_confidence(distances, threshold):
+    """Map distances to [0, 1] so that distance == threshold gives CONFIDENCE_THRESHOLD"""
+    return np.clip(1 - (1 - CONFIDENCE_THRESHOLD) * np.asarray(distances) / threshold, 0, 1)
+
+
+class CentroidEngine:
+    """Open-set nearest-centroid recognizer over raw 128-d face encodings
+
+    Each student is represented by the mean of their encodings, so enrolling a
+    student only adds (or updates) that student's row; nothing else is refit.
+    A face is matched to the nearest centroid, and the Euclidean distance is
+    mapped to a confidence so that distance == threshold gives exactly
+    CONFIDENCE_THRESHOLD. Faces further away than the threshold come out below
+    the API's acceptance cut-off and are reported as unknown.
+    """
+
+    def __init__(self, threshold=None):
+        self._lock = threading.Lock()
+        self.fixed_threshold = threshold
+        self._rows = {}
+        self._counts = np.empty(0)
+        # Published read-only snapshot: (labels, centroids, centroid squared norms, threshold)
+        self._snapshot = (np.array([]), np.empty((0, 128)), np.empty(0), threshold or DEFAULT_DISTANCE)
+
+    @property
+    def ready(self):
+        return len(self._snapshot[0]) > 0
+
+    @property
+    def threshold(self):
+        return self._snapshot[3]
+
+    def fit(self, X, y):
+        """Rebuild every centroid from scratch and recalibrate the distance threshold"""
+        X = np.asarray(X, dtype=np.float64)
+        labels, inverse = np.unique(np.asarray(y), return_inverse=True)
+        sums = np.zeros((len(labels), X.shape[1]))
+        np.add.at(sums, inverse, X)
+        counts = np.bincount(inverse, minlength=len(labels)).astype(np.float64)
+        centroids = sums / counts[:, None]
+        with self._lock:
+            self._rows = {label: i for i, label in enumerate(labels)}
+            self._counts = counts
+            threshold = self.fixed_threshold or self._calibrate(X, centroids, inverse)
+            self._snapshot = (labels, centroids, (centroids ** 2).sum(axis=1), threshold)
+        logger.info(f"Centroid engine fit on {len(X)} samples, {len(labels)} students, "
+                    f"threshold {self.threshold:.3f}")
+
+    def add(self, label, encodings):
+        """Add (or extend) one student without touching the other centroids"""
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        if not len(encodings):
+            return
+        with self._lock:
+            labels, centroids, norms, threshold = self._snapshot
+            centroids, norms, counts = centroids.copy(), norms.copy(), self._counts.copy()
+            row = self._rows.get(label)
+            if row is None:
+                row = len(labels)
+                labels = np.append(labels, label)
+                centroids = np.vstack([centroids, np.zeros(128)])
+                norms = np.append(norms, 0.0)
+                counts = np.append(counts, 0.0)
+            # Running mean update of this student's row only
+            total = counts[row] + len(encodings)
+            centroids[row] = (centroids[row] * counts[row] + encodings.sum(axis=0)) / total
+            norms[row] = centroids[row] @ centroids[row]
+            counts[row] = total
+            self._rows[label] = row
+            self._counts = counts
+            self._snapshot = (labels, centroids, norms, threshold)
+
+    def _calibrate(self, X, centroids, inverse):
+        """Pick a distance threshold from how far training samples sit from their own centroid"""
+        if len(X) < 2:
+            return DEFAULT_DISTANCE
+        own_distances = np.linalg.norm(X - centroids[inverse], axis=1)
+        # Allow some headroom above the 99th percentile for unseen lighting/pose
+        return float(min(MAX_DISTANCE, np.percentile(own_distances, 99) * 1.25))
+
+    def predict(self, face_encodings):
+        """Return (labels, confidences) for a batch of encodings"""
+        labels, centroids, centroid_norms, threshold = self._snapshot
+        X = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+        best = np.empty(len(X), dtype=np.int64)
+        distances = np.empty(len(X))
+        for start in range(0, len(X), PREDICT_CHUNK):
+            squared = squared_distances(X[start:start + PREDICT_CHUNK], centroids, centroid_norms)
+            chunk_best = squared.argmin(axis=1)
+            best[start:start + len(chunk_best)] = chunk_best
+            distances[start:start + len(chunk_best)] = np.sqrt(squared[np.arange(len(chunk_best)), chunk_best])
+        return labels[best], distance_confidence(distances, threshold)
+
+    def reset(self):
+        with self._lock:
+            self._rows, self._counts = {}, np.empty(0)
+            self._snapshot = (np.array([]), np.empty((0, 128)), np.empty(0),
+                              self.fixed_threshold or DEFAULT_DISTANCE)
+
+
+class AnnEngine:
+    """k-nearest-neighbour recognizer over every stored encoding, backed by an IVFIndex
+
+    The index is rebuilt by retrain_model. Students enrolled since the last
+    build are kept in a small side buffer that is searched exhaustively, so they
+    are recognized immediately. The label is a distance-weighted vote among the
+    top-k neighbours inside the distance threshold, and the winning label's
+    nearest distance is mapped to a confidence like CentroidEngine does.
+    """
+
+    def __init__(self, k=5, n_probe=8, threshold=MAX_DISTANCE):
+        self.k = k
+        self.n_probe = n_probe
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.index = None
+        self._pending = (np.array([], dtype=str), np.empty((0, 128), dtype=np.float32))
+
+    @property
+    def ready(self):
+        return (self.index is not None and len(self.index) > 0) or len(self._pending[0]) > 0
+
+    def set_index(self, index):
+        """Publish a freshly built (or loaded) index and drop the side buffer it now covers"""
+        with self._lock:
+            self.index = index
+            self._pending = (np.array([], dtype=str), np.empty((0, 128), dtype=np.float32))
+
+    def add(self, label, encodings):
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+        with self._lock:
+            labels, vectors = self._pending
+            self._pending = (np.concatenate([labels, np.full(len(encodings), str(label))]),
+                             np.concatenate([vectors, encodings]))
+
+    def search(self, face_encodings, k=None):
+        """Return (distances, labels) of the k nearest stored encodings, shape (n, k)"""
+        k = k or self.k
+        X = np.asarray(face_encodings, dtype=np.float32).reshape(-1, 128)
+        index, (pending_labels, pending_vectors) = self.index, self._pending
+
+        if index is not None and len(index):
+            distances, labels = index.search(X, k=k, n_probe=self.n_probe)
+        else:
+            distances = np.full((len(X), k), np.inf, dtype=np.float32)
+            labels = np.full((len(X), k), '', dtype=str)
+
+        if len(pending_labels):
+            pending_distances = np.sqrt(squared_distances(X, pending_vectors))
+            distances = np.concatenate([distances, pending_distances], axis=1)
+            labels = np.concatenate([labels.astype(str),
+                                     np.broadcast_to(pending_labels, pending_distances.shape)], axis=1)
+            top = np.argsort(distances, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, top, axis=1)
+            labels = np.take_along_axis(labels, top, axis=1)
+        return distances, labels
+
+    def predict(self, face_encodings):
+        """Return (labels, confidences) for a batch of encodings"""
+        distances, labels = self.search(face_encodings)
+        best_labels, best_distances = [], []
+        for row_distances, row_labels in zip(distances, labels):
+            votes = {}
+            for distance, label in zip(row_distances, row_labels):
+                if distance <= self.threshold:
+                    votes[label] = votes.get(label, 0) + 1 / (distance + 1e-6)
+            label = max(votes, key=votes.get) if votes else row_labels[0]
+            best_labels.append(label)
+            best_distances.append(row_distances[row_labels == label].min())
+        return np.array(best_labels), distance_confidence(best_distances, self.threshold)
+
+    def reset(self):
+        self.set_index(None)
@@ -0,0 +1,113 @@
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class RetrainWorker:
+    """Background thread that coalesces bursts of retrain requests into single jobs
+
+    request() only records why a retrain is wanted. The worker waits until no new
+    request has arrived for debounce_seconds, then runs job_fn once for
+    everything that queued up meanwhile. Jobs never overlap: run_now() shares
+    the same lock for callers that need a synchronous retrain.
+    """
+
+    def __init__(self, job_fn, debounce_seconds=5.0):
+        self.job_fn = job_fn
+        self.debounce_seconds = debounce_seconds
+        self._cond = threading.Condition()
+        self._job_lock = threading.Lock()
+        self._thread = None
+        self._pending_reasons = []
+        self._last_request = None
+        self._next_job_id = 1
+        self._pending_job_id = None
+        self._running = None
+        self._last_job = None
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name='retrain-worker', daemon=True)
+            self._thread.start()
+
+    def _new_job_id(self):
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        return job_id
+
+    def request(self, reason):
+        """Queue a retrain; returns the id of the job that will cover it"""
+        with self._cond:
+            if self._pending_job_id is None:
+                self._pending_job_id = self._new_job_id()
+            self._pending_reasons.append(reason)
+            self._last_request = time.monotonic()
+            self._ensure_started()
+            self._cond.notify()
+            return self._pending_job_id
+
+    def run_now(self, reason='manual'):
+        """Run a retrain synchronously in the caller's thread; returns the job record"""
+        with self._cond:
+            job_id = self._new_job_id()
+        return self._run_job(job_id, [reason])
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending_reasons:
+                    self._cond.wait()
+                # Debounce: keep waiting while registrations keep arriving
+                while True:
+                    remaining = self._last_request + self.debounce_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                job_id, reasons = self._pending_job_id, self._pending_reasons
+                self._pending_job_id, self._pending_reasons = None, []
+            self._run_job(job_id, reasons)
+
+    def _run_job(self, job_id, reasons):
+        with self._job_lock:
+            job = {
+                "id": job_id,
+                "reasons": reasons,
+                "state": "running",
+                "startedAt": datetime.now().isoformat()
+            }
+            self._running = job
+            start = time.perf_counter()
+            try:
+                success = bool(self.job_fn())
+            except Exception as e:
+                logger.error(f"Retrain job {job_id} failed: {e}")
+                success = False
+            job = dict(job, state="succeeded" if success else "failed",
+                       finishedAt=datetime.now().isoformat(),
+                       durationSeconds=round(time.perf_counter() - start, 3))
+            self._running = None
+            self._last_job = job
+            logger.info(f"Retrain job {job_id} {job['state']} in {job['durationSeconds']}s "
+                        f"({len(reasons)} request(s) coalesced)")
+            return job
+
+    def status(self):
+        with self._cond:
+            pending = None
+            if self._pending_job_id is not None:
+                pending = {"id": self._pending_job_id, "reasons": list(self._pending_reasons)}
+            running = self._running
+            if pending:
+                state = "running" if running else "pending"
+            else:
+                state = "running" if running else "idle"
+            return {
+                "state": state,
+                "debounceSeconds": self.debounce_seconds,
+                "pendingJob": pending,
+                "runningJob": running,
+                "lastJob": self._last_job
+            }
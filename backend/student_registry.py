@@ -0,0 +1,227 @@
+import json
+import os
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+REGISTRY_DB_PATH = os.environ.get('REGISTRY_DB_PATH', os.path.join(BASE_DIR, 'registry.db'))
+# JSON files the registry replaces; imported once into an empty registry
+STUDENTS_JSON_PATH = os.path.join(BASE_DIR, 'students.json')
+PENDING_JSON_PATH = os.path.join(BASE_DIR, 'pending_students.json')
+FINAL_JSON_PATH = os.path.join(BASE_DIR, 'final.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    roll_no TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('pending', 'registered')),
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    completed_at TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS students_status ON students (status);
+CREATE TABLE IF NOT EXISTS final_roster (
+    roll_no TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    added_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta (key, value) VALUES ('roster_version', '0');
+"""
+
+STUDENT_COLUMNS = 'roll_no, name, sample_count, status, created_at'
+
+
+def student_dict(row):
+    """Row -> the student JSON shape the API has always returned"""
+    return {
+        "name": row['name'],
+        "rollNo": row['roll_no'],
+        "sampleCount": row['sample_count'],
+        "registrationComplete": row['status'] == 'registered',
+        "createdAt": row['created_at']
+    }
+
+
+class StudentRegistry:
+    """Pending, registered and final student rosters in one SQLite database (WAL mode)
+
+    Each student is one row keyed by roll number. Registration frames upsert
+    that row, and completing a registration flips its status from pending to
+    registered in the same statement. The final roster is kept in its own
+    table and only ever gains rows. Every change that affects the registered
+    roster bumps roster_version in the meta table, so other processes can
+    tell cheaply whether a cached roster is stale.
+    """
+
+    def __init__(self, path=REGISTRY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # A connection inherited through fork (inference pool workers) must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, so concurrent writers queue instead of racing"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _bump_roster_version(conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'roster_version'")
+
+    def record_sample(self, roll_no, name, sample_count, required_samples):
+        """Save a student's sample count after a registration frame
+
+        Creates the pending entry on the first frame. Once sample_count reaches
+        required_samples, the student moves to the registered roster. Returns
+        (student, completed_now); completed_now is True for exactly one caller
+        even when frames of the same student race.
+        """
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO students (roll_no, name, status, sample_count, created_at) "
+                "VALUES (?, ?, 'pending', ?, ?) "
+                "ON CONFLICT (roll_no) DO UPDATE SET sample_count = MAX(sample_count, excluded.sample_count)",
+                (str(roll_no), name, sample_count, now))
+            completed_now = False
+            if sample_count >= required_samples:
+                completed_now = conn.execute(
+                    "UPDATE students SET status = 'registered', completed_at = ? "
+                    "WHERE roll_no = ? AND status = 'pending'", (now, str(roll_no))).rowcount == 1
+                if completed_now:
+                    self._bump_roster_version(conn)
+            row = conn.execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE roll_no = ?",
+                               (str(roll_no),)).fetchone()
+        return student_dict(row), completed_now
+
+    def get(self, roll_no):
+        row = self._connect().execute(f"SELECT {STUDENT_COLUMNS} FROM students WHERE roll_no = ?",
+                                      (str(roll_no),)).fetchone()
+        return student_dict(row) if row else None
+
+    def students(self, status='registered'):
+        """Students of one roster ('pending' or 'registered'), in registration order"""
+        rows = self._connect().execute(
+            f"SELECT {STUDENT_COLUMNS} FROM students WHERE status = ? ORDER BY created_at, roll_no", (status,))
+        return [student_dict(row) for row in rows]
+
+    def count(self, status='registered'):
+        return self._connect().execute("SELECT COUNT(*) FROM students WHERE status = ?", (status,)).fetchone()[0]
+
+    def roster_version(self):
+        return int(self._connect().execute(
+            "SELECT value FROM meta WHERE key = 'roster_version'").fetchone()[0])
+
+    def merge_final(self):
+        """Add registered students missing from the final roster; returns how many were added"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "INSERT OR IGNORE INTO final_roster (roll_no, name, sample_count, created_at, added_at) "
+                "SELECT roll_no, name, sample_count, created_at, ? FROM students WHERE status = 'registered'",
+                (datetime.now().isoformat(),)).rowcount
+
+    def final_roster(self):
+        rows = self._connect().execute(
+            "SELECT roll_no, name, sample_count, 'registered' AS status, created_at FROM final_roster "
+            "ORDER BY added_at, created_at, roll_no")
+        return [student_dict(row) for row in rows]
+
+    def clear_students(self):
+        """Drop the pending and registered rosters (the final roster is kept)"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM students")
+            self._bump_roster_version(conn)
+
+    def import_json(self, students_path=STUDENTS_JSON_PATH, pending_path=PENDING_JSON_PATH,
+                    final_path=FINAL_JSON_PATH):
+        """One-time import of the legacy JSON rosters; a no-op once done
+
+        Returns the number of rows imported per roster. The JSON files are left
+        in place but no longer read or written.
+        """
+        def read(path):
+            if not os.path.exists(path):
+                return []
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        def rows(entries, status):
+            return [(str(s['rollNo']), s.get('name') or str(s['rollNo']), status, int(s.get('sampleCount', 0)),
+                     s.get('createdAt') or datetime.now().isoformat()) for s in entries if s.get('rollNo')]
+
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return None
+
+            registered = rows(read(students_path), 'registered')
+            pending = rows(read(pending_path), 'pending')
+            final = rows(read(final_path), 'registered')
+            insert = ("INSERT OR IGNORE INTO students (roll_no, name, status, sample_count, created_at) "
+                      "VALUES (?, ?, ?, ?, ?)")
+            # Registered entries first, so a stale pending copy of the same student is ignored
+            conn.executemany(insert, registered)
+            conn.executemany(insert, pending)
+            now = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT OR IGNORE INTO final_roster (roll_no, name, sample_count, created_at, added_at) "
+                "VALUES (?, ?, ?, ?, ?)", [(r[0], r[1], r[3], r[4], now) for r in final])
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (now,))
+            self._bump_roster_version(conn)
+
+        counts = {'registered': len(registered), 'pending': len(pending), 'final': len(final)}
+        logger.info(f"Imported JSON rosters into {self.path}: {counts}")
+        return counts
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_student_registry():
+    """Process-wide StudentRegistry, opened (and the JSON rosters imported) on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = StudentRegistry()
+            _registry.import_json()
+        return _registry
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    registry = StudentRegistry()
+    counts = registry.import_json()
+    print(f"Imported {counts}" if counts else f"{registry.path} was already imported")
+    print(f"{registry.count('registered')} registered, {registry.count('pending')} pending, "
+          f"{len(registry.final_roster())} in the final roster")
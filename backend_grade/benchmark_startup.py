@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter per measurement, so module imports are cold
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.load_model_components(preload={preload!r})
+t2 = time.perf_counter()
+client = app.app.test_client()
+response = client.post('/predict', json={student!r})
+assert response.status_code == 200, response.get_json()
+t3 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'ready': t2 - t0, 'first_prediction': t3 - t0}}))
+"""
+
+SAMPLE_STUDENT = {
+    "previousSemesterGPA": 8.5, "numberOfBacklogs": 0, "cumulativeGPA": 7.8,
+    "t1Marks": 18, "t2Marks": 17, "t3Marks": 30, "attendancePercentage": 85,
+    "taMarks": 22, "adherenceToDeadlines": 4
+}
+
+def measure(app_dir, preload, runs):
+    env = dict(os.environ)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [app_dir, here, env.get('PYTHONPATH')]))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(preload=preload, student=SAMPLE_STUDENT)],
+                             cwd=here, env=env, check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {stage: statistics.median(sample[stage] for sample in samples) for stage in samples[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure grade API cold start from the model bundle")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--app-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help="directory containing the API's app.py")
+    parser.add_argument('--preload', nargs='+', default=['lazy', 'eager'], choices=['lazy', 'eager'])
+    args = parser.parse_args()
+
+    print(f"Median of {args.runs} fresh processes (engine: {os.environ.get('GRADE_ENGINE', 'xgboost')})")
+    print(f"{'preload':<8} {'import':>10} {'ready':>10} {'first predict':>14}")
+    for preload in args.preload:
+        result = measure(args.app_dir, preload, args.runs)
+        print(f"{preload:<8} {result['import'] * 1000:8.1f}ms {result['ready'] * 1000:8.1f}ms "
+              f"{result['first_prediction'] * 1000:12.1f}ms")
+
+if __name__ == "__main__":
+    main()
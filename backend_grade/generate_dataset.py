@@ -1,92 +1,182 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
-import random
 from scipy.stats import truncnorm
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 100_000
 
-def truncated_normal(mean, std, lower, upper):
+# Lower bound of each grade's Total_Score band, lowest grade first
+GRADE_BANDS = np.array([25, 35, 45, 55, 65, 75, 85, 90])
+GRADES = np.array(['F', 'D', 'D+', 'C', 'C+', 'B', 'B+', 'A', 'A+'])
+
+COLUMNS = ['Student_ID', 'Previous_Semester_GPA', 'No_of_Backlogs', 'Cumulative_GPA',
+           'T1_Marks', 'T2_Marks', 'T3_Marks', 'Attendance_Percentage', 'TA_Marks',
+           'Adherence_to_Deadlines', 'Total_Score', 'Final_Grade']
+
+def truncated_normal(mean, std, lower, upper, size, rng):
+    """size draws from N(mean, std) truncated to [lower, upper]; mean may be an array"""
     a, b = (lower - mean) / std, (upper - mean) / std
-    return truncnorm.rvs(a, b, loc=mean, scale=std)
-
-def generate_clean_student_dataset(n_students=15000):
-    students = []
-
-    for i in range(n_students):
-        student_id = f"S{i+1:05d}"
-
-        # Attendance and adherence
-        attendance = int(round(truncated_normal(80, 10, 30, 100)))
-        adherence = int(round(truncated_normal(4, 1, 0, 5)))
-
-        # TA marks are influenced by attendance and adherence
-        ta_base = (attendance / 100) * 15 + (adherence / 5) * 10  # total weight = 25
-        ta_marks = int(round(min(25, max(0, ta_base + np.random.normal(0, 1.5)))))
-
-        # Backlogs (random, but can affect test performance)
-        backlogs = np.random.choice([0, 1, 2, 3], p=[0.7, 0.2, 0.07, 0.03])
-
-        # Test marks are influenced negatively by backlogs
-        distraction_penalty = backlogs * 1.5
-
-        t1_marks = int(round(truncated_normal(15 - distraction_penalty, 2, 0, 20)))
-        t2_marks = int(round(truncated_normal(15 - distraction_penalty, 2, 0, 20)))
-        t3_marks = int(round(truncated_normal(27 - distraction_penalty, 3, 0, 35)))
-
-        # GPA fields are random (they don't affect grade)
-        prev_gpa = round(truncated_normal(6.5, 1.2, 0, 10), 2)
-        cum_gpa = round(truncated_normal(6.8, 1.1, 0, 10), 2)
-
-        # Total score (T1 + T2 + T3 + TA)
-        total_score = t1_marks + t2_marks + t3_marks + ta_marks
-
-        # Grade mapping
-        if total_score >= 90:
-            grade = 'A+'
-        elif total_score >= 85:
-            grade = 'A'
-        elif total_score >= 75:
-            grade = 'B+'
-        elif total_score >= 65:
-            grade = 'B'
-        elif total_score >= 55:
-            grade = 'C+'
-        elif total_score >= 45:
-            grade = 'C'
-        elif total_score >= 35:
-            grade = 'D+'
-        elif total_score >= 25:
-            grade = 'D'
+    return truncnorm.rvs(a, b, loc=mean, scale=std, size=size, random_state=rng)
+
+def rounded(values):
+    return np.rint(values).astype(np.int64)
+
+def generate_chunk(start, n_students, seed):
+    """Students start+1 .. start+n_students, every column drawn as one array"""
+    rng = np.random.default_rng(seed)
+
+    # Attendance and adherence
+    attendance = rounded(truncated_normal(80, 10, 30, 100, n_students, rng))
+    adherence = rounded(truncated_normal(4, 1, 0, 5, n_students, rng))
+
+    # TA marks are influenced by attendance and adherence
+    ta_base = (attendance / 100) * 15 + (adherence / 5) * 10  # total weight = 25
+    ta_marks = rounded(np.clip(ta_base + rng.normal(0, 1.5, n_students), 0, 25))
+
+    # Backlogs (random, but can affect test performance)
+    backlogs = rng.choice([0, 1, 2, 3], size=n_students, p=[0.7, 0.2, 0.07, 0.03])
+
+    # Test marks are influenced negatively by backlogs
+    distraction_penalty = backlogs * 1.5
+
+    t1_marks = rounded(truncated_normal(15 - distraction_penalty, 2, 0, 20, n_students, rng))
+    t2_marks = rounded(truncated_normal(15 - distraction_penalty, 2, 0, 20, n_students, rng))
+    t3_marks = rounded(truncated_normal(27 - distraction_penalty, 3, 0, 35, n_students, rng))
+
+    # GPA fields are random (they don't affect grade)
+    prev_gpa = np.round(truncated_normal(6.5, 1.2, 0, 10, n_students, rng), 2)
+    cum_gpa = np.round(truncated_normal(6.8, 1.1, 0, 10, n_students, rng), 2)
+
+    # Total score (T1 + T2 + T3 + TA)
+    total_score = t1_marks + t2_marks + t3_marks + ta_marks
+
+    # Grade mapping: index of the highest band lower bound <= total
+    grade = GRADES[np.searchsorted(GRADE_BANDS, total_score, side='right')]
+
+    student_ids = np.char.add('S', np.char.zfill(np.arange(start + 1, start + n_students + 1).astype(str), 5))
+
+    return pd.DataFrame({
+        'Student_ID': student_ids,
+        'Previous_Semester_GPA': prev_gpa,
+        'No_of_Backlogs': backlogs,
+        'Cumulative_GPA': cum_gpa,
+        'T1_Marks': t1_marks,
+        'T2_Marks': t2_marks,
+        'T3_Marks': t3_marks,
+        'Attendance_Percentage': attendance,
+        'TA_Marks': ta_marks,
+        'Adherence_to_Deadlines': adherence,
+        'Total_Score': total_score,
+        'Final_Grade': grade
+    }, columns=COLUMNS)
+
+def generate_csv_chunk(start, n_students, seed):
+    """One chunk as CSV rows without a header, so formatting also runs in the workers"""
+    return generate_chunk(start, n_students, seed).to_csv(header=False, index=False)
+
+def chunk_plan(n_students, chunk_size, seed):
+    """(start, size, seed) per chunk; the same seed and chunk size always give the same data"""
+    n_chunks = max(1, -(-n_students // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    return [(i * chunk_size, min(chunk_size, n_students - i * chunk_size), seeds[i])
+            for i in range(n_chunks)]
+
+def iter_chunks(n_students, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, chunk_fn=generate_chunk):
+    """Yield chunk_fn's result for every chunk, in order, running up to `workers` chunks in parallel"""
+    plan = chunk_plan(n_students, chunk_size, seed)
+    if workers <= 1:
+        for start, size, chunk_seed in plan:
+            yield chunk_fn(start, size, chunk_seed)
+        return
+
+    # Keep a bounded number of chunks in flight so memory stays flat however large n is
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, size, chunk_seed in plan:
+            pending.append(executor.submit(chunk_fn, start, size, chunk_seed))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def generate_clean_student_dataset(n_students=15000, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Whole dataset as one DataFrame (for sizes that fit in memory)"""
+    return pd.concat(iter_chunks(n_students, seed, chunk_size, workers), ignore_index=True)
+
+def import_pyarrow():
+    """Return (pyarrow, pyarrow.parquet), failing with a clear message when pyarrow is missing"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow (pip install -r requirements.txt); "
+                          "use a .csv path otherwise") from None
+    return pyarrow, pyarrow.parquet
+
+def output_format(path, file_format=None):
+    return file_format or ('parquet' if path.endswith(('.parquet', '.pq')) else 'csv')
+
+def write_dataset(path, n_students, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, file_format=None):
+    """Stream the dataset to a CSV or Parquet file one chunk at a time; returns rows written"""
+    file_format = output_format(path, file_format)
+    rows = 0
+    tmp_path = f"{path}.tmp"
+    writer = None
+    try:
+        if file_format == 'parquet':
+            pa, pq = import_pyarrow()
+            for chunk in iter_chunks(n_students, seed, chunk_size, workers):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+            if writer is not None:
+                writer.close()
         else:
-            grade = 'F'
-
-        student = {
-            'Student_ID': student_id,
-            'Previous_Semester_GPA': prev_gpa,
-            'No_of_Backlogs': backlogs,
-            'Cumulative_GPA': cum_gpa,
-            'T1_Marks': t1_marks,
-            'T2_Marks': t2_marks,
-            'T3_Marks': t3_marks,
-            'Attendance_Percentage': attendance,
-            'TA_Marks': ta_marks,
-            'Adherence_to_Deadlines': adherence,
-            'Total_Score': total_score,
-            'Final_Grade': grade
-        }
-
-        students.append(student)
-
-    return pd.DataFrame(students)
+            with open(tmp_path, 'w', newline='') as f:
+                f.write(','.join(COLUMNS) + '\n')
+                for text in iter_chunks(n_students, seed, chunk_size, workers, chunk_fn=generate_csv_chunk):
+                    f.write(text)
+                rows = n_students
+    except BaseException:
+        # Close before unlinking so the writer does not flush into a removed file
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, path)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic student dataset")
+    parser.add_argument('--rows', type=int, default=15000)
+    parser.add_argument('--output', default='clean_student_dataset.csv',
+                        help="output file; .parquet/.pq writes Parquet, anything else CSV")
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="override the format implied by --output")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per chunk; output is reproducible for a given seed and chunk size")
+    parser.add_argument('--workers', type=int, default=1, help="processes generating chunks in parallel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = write_dataset(args.output, args.rows, args.seed, args.chunk_size, args.workers, args.format)
+    elapsed = time.perf_counter() - start
+
+    print(f"Dataset generated and saved as '{args.output}'")
+    print(f"{rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    if output_format(args.output, args.format) == 'csv':
+        print("\nFirst 5 rows:")
+        print(pd.read_csv(args.output, nrows=5))
 
 if __name__ == "__main__":
-    # Generate the clean dataset
-    clean_df = generate_clean_student_dataset(15000)
-    clean_df.to_csv('clean_student_dataset.csv', index=False)
-    print("Dataset generated and saved as 'clean_student_dataset.csv'")
-    print(f"Dataset shape: {clean_df.shape}")
-    print("\nFirst 5 rows:")
-    print(clean_df.head())
+    main()
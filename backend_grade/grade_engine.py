@@ -0,0 +1,221 @@
+import json
+import numpy as np
+
+# Rows evaluated at once; bounds the (rows x trees) node matrix
+PREDICT_CHUNK = 2048
+
+_SIGN = np.int64(0x7FFFFFFFFFFFFFFF)
+
+
+def _ordered(x):
+    """float64 -> int64 keys in the same order (so bisection can step one float at a time)"""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, -(bits & _SIGN), bits)
+
+
+def _from_ordered(keys):
+    return np.where(keys < 0, (-keys) | ~_SIGN, keys).view(np.float64)
+
+
+def fold_thresholds(condition, mean, scale):
+    """Raw-feature thresholds t with  x < t  <=>  float32((x - mean) / scale) < condition
+
+    XGBoost casts the scaled feature to float32 before comparing it with the
+    float32 split condition, so near a split the exact boundary in raw units is
+    not condition * scale + mean. The left-hand side is non-decreasing in x, so
+    the smallest x that goes right is found by bisecting over float64 values.
+    """
+    condition = np.asarray(condition, dtype=np.float32)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def goes_left(x):
+        with np.errstate(over='ignore', invalid='ignore'):
+            return ((x - mean) / scale).astype(np.float32) < condition
+
+    guess = condition.astype(np.float64) * scale + mean
+    step = np.abs(scale) * np.spacing(np.abs(condition)).astype(np.float64) + \
+        np.spacing(np.abs(guess)) + np.spacing(np.abs(mean))
+    low, high = guess - step, guess + step
+    # Widen the bracket until low goes left and high goes right
+    while True:
+        widen_low, widen_high = ~goes_left(low), goes_left(high)
+        if not (widen_low.any() or widen_high.any()):
+            break
+        step = step * 2
+        low = np.where(widen_low, guess - step, low)
+        high = np.where(widen_high, guess + step, high)
+
+    low, high = _ordered(low), _ordered(high)
+    while True:
+        open_ = high - low > 1
+        if not open_.any():
+            break
+        middle = low + (high - low) // 2
+        left = goes_left(_from_ordered(middle))
+        low = np.where(open_ & left, middle, low)
+        high = np.where(open_ & ~left, middle, high)
+    return _from_ordered(high)
+
+
+class CompiledTreeEnsemble:
+    """XGBoost multi-class ensemble flattened into NumPy node arrays
+
+    Every tree's nodes are concatenated into parallel arrays (split feature,
+    threshold, left/right child, default direction, leaf value). The
+    StandardScaler and XGBoost's float32 cast of the scaled feature are folded
+    into the thresholds (see fold_thresholds), so raw float64 feature rows are
+    compared directly and take the same branch XGBoost would.
+    Prediction walks all trees for a batch of rows at once, one tree level per
+    step, then sums leaf values per class in float32 in tree order, so margins
+    match XGBoost's bit for bit. Softmax follows XGBoost's order of operations
+    (float32 exp, float64 sum, float32 divide); XGBoost takes expf from the C
+    library, which is not always correctly rounded, so a probability can still
+    differ from XGBoost's in the last bit or two.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, default_left, value,
+                 tree_class, base_margin, max_depth):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.tree_class = tree_class
+        self.base_margin = base_margin
+        self.max_depth = int(max_depth)
+        self.n_classes = len(base_margin)
+        # Trees usually come round by round, one per class; then a round is one vector add
+        self._round_major = (len(roots) % self.n_classes == 0 and
+                             np.array_equal(tree_class, np.arange(len(roots)) % self.n_classes))
+
+    @classmethod
+    def from_xgboost(cls, xgb_model, scaler=None):
+        """Compile a fitted XGBClassifier or Booster (and the scaler its inputs went through)"""
+        booster = xgb_model.get_booster() if hasattr(xgb_model, 'get_booster') else xgb_model
+        raw = json.loads(booster.save_raw('json'))
+        return cls.from_xgboost_json(raw, scaler)
+
+    @classmethod
+    def from_xgboost_json(cls, raw, scaler=None):
+        """Compile a model from XGBoost's JSON model format"""
+        learner = raw['learner']
+        objective = learner['objective']['name']
+        if objective not in ('multi:softprob', 'multi:softmax'):
+            raise ValueError(f"Unsupported objective {objective}")
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster {booster['name']}")
+
+        n_classes = int(learner['learner_model_param']['num_class'])
+        base_score = np.array(
+            [float(v) for v in str(learner['learner_model_param']['base_score']).strip('[]').split(',')],
+            dtype=np.float32)
+        base_margin = np.broadcast_to(base_score, (n_classes,)).copy()
+
+        n_features = int(learner['learner_model_param']['num_feature'])
+        mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler is not None else np.zeros(n_features)
+        scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler is not None else np.ones(n_features)
+
+        trees = booster['model']['trees']
+        roots, features, thresholds, lefts, rights, defaults, values = [], [], [], [], [], [], []
+        max_depth, offset = 0, 0
+        for tree in trees:
+            if any(int(t) != 0 for t in tree.get('split_type', [])):
+                raise ValueError("Categorical splits are not supported")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            feature = np.asarray(tree['split_indices'], dtype=np.int64)
+            condition = np.asarray(tree['split_conditions'], dtype=np.float32)
+            leaf = left == -1
+
+            roots.append(offset)
+            features.append(np.where(leaf, -1, feature))
+            # Split conditions for now; folded into raw-feature thresholds for all trees at once below
+            thresholds.append(np.where(leaf, np.float32(0), condition))
+            lefts.append(np.where(leaf, -1, left + offset))
+            rights.append(np.where(leaf, -1, right + offset))
+            defaults.append(np.asarray(tree['default_left'], dtype=bool))
+            # Leaf weights are stored in split_conditions
+            values.append(np.where(leaf, condition, np.float32(0)))
+            max_depth = max(max_depth, cls._depth(left, right))
+            offset += len(left)
+
+        feature = np.concatenate(features)
+        split_feature = np.maximum(feature, 0)
+        threshold = np.where(feature >= 0, fold_thresholds(
+            np.concatenate(thresholds), mean[split_feature], scale[split_feature]), 0.0)
+
+        return cls(
+            roots=np.asarray(roots, dtype=np.int64),
+            feature=feature,
+            threshold=threshold,
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            default_left=np.concatenate(defaults),
+            value=np.concatenate(values).astype(np.float32),
+            tree_class=np.asarray(booster['model']['tree_info'], dtype=np.int64),
+            base_margin=base_margin,
+            max_depth=max_depth)
+
+    @staticmethod
+    def _depth(left, right):
+        depth, level = 0, [0]
+        while True:
+            level = [child for node in level for child in (left[node], right[node]) if child != -1]
+            if not level:
+                return depth
+            depth += 1
+
+    def save(self, path):
+        np.savez(path, roots=self.roots, feature=self.feature, threshold=self.threshold,
+                 left=self.left, right=self.right, default_left=self.default_left, value=self.value,
+                 tree_class=self.tree_class, base_margin=self.base_margin, max_depth=self.max_depth)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+    def _leaf_values(self, X):
+        """Leaf value reached in every tree, shape (rows, trees)"""
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.maximum(feature, 0)]
+            go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+            nodes = np.where(internal, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+        return self.value[nodes]
+
+    def predict_margin(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        margins = np.empty((len(X), self.n_classes), dtype=np.float32)
+        for start in range(0, len(X), PREDICT_CHUNK):
+            leaves = self._leaf_values(X[start:start + PREDICT_CHUNK])
+            margin = np.tile(self.base_margin, (len(leaves), 1))
+            if self._round_major:
+                for round_leaves in leaves.reshape(len(leaves), -1, self.n_classes).transpose(1, 0, 2):
+                    margin += round_leaves
+            else:
+                for t, k in enumerate(self.tree_class):
+                    margin[:, k] += leaves[:, t]
+            margins[start:start + len(leaves)] = margin
+        return margins
+
+    def predict_proba(self, X):
+        """Class probabilities for raw (unscaled) feature rows"""
+        margins = self.predict_margin(X)
+        # exp in float64 rounded to float32 is the correctly rounded float32 exp
+        exp = np.exp((margins - margins.max(axis=1, keepdims=True)).astype(np.float64)).astype(np.float32)
+        return exp / exp.astype(np.float64).sum(axis=1, keepdims=True).astype(np.float32)
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
@@ -0,0 +1,186 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+BUNDLE_PATH = 'grade_model.bundle'
+MAGIC = b'GRADEMDL'
+FORMAT_VERSION = 1
+
+# File layout: MAGIC | header length (uint32, little-endian) | JSON header | sections
+# The header describes everything the API needs before the model itself is loaded:
+# feature names, grade mapping, scaler statistics and the offset, length and
+# sha256 of each section. Sections are 'model' (the booster in XGBoost's native
+# UBJSON format) and, optionally, 'compiled' (grade_engine arrays as .npz).
+_PREFIX = struct.Struct('<8sI')
+
+
+class BundleError(Exception):
+    """The bundle file is missing, corrupt or of an unsupported format"""
+
+
+def write_bundle(path, xgb_model, scaler, feature_names, grade_mapping, compiled=None, metadata=None):
+    """Write a fitted XGBClassifier or Booster and everything needed to serve it as one file
+
+    Every tree of the booster is served, so pass the one cut at the
+    early-stopping round (train_model.best_booster). grade_mapping maps class
+    index -> grade. The file is written next to path and renamed into place,
+    so a running API never sees a partial bundle.
+    """
+    import xgboost
+
+    booster = xgb_model.get_booster() if hasattr(xgb_model, 'get_booster') else xgb_model
+    sections = [('model', 'ubj', bytes(booster.save_raw(raw_format='ubj')))]
+    if compiled is not None:
+        buffer = io.BytesIO()
+        compiled.save(buffer)
+        sections.append(('compiled', 'npz', buffer.getvalue()))
+
+    offset, section_info = 0, {}
+    for name, data_format, data in sections:
+        section_info[name] = {
+            'format': data_format,
+            'offset': offset,
+            'length': len(data),
+            'sha256': hashlib.sha256(data).hexdigest()
+        }
+        offset += len(data)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_version': section_info['model']['sha256'][:12],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'xgboost_version': xgboost.__version__,
+        'boosting_rounds': booster.num_boosted_rounds(),
+        'feature_names': list(feature_names),
+        'grade_mapping': {str(k): v for k, v in grade_mapping.items()},
+        'scaler': {
+            'mean': np.asarray(scaler.mean_, dtype=np.float64).tolist(),
+            'scale': np.asarray(scaler.scale_, dtype=np.float64).tolist()
+        },
+        'sections': section_info,
+        'metadata': metadata or {}
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for _, _, data in sections:
+            f.write(data)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    """Read and validate only the JSON header; returns (header, offset of the first section)"""
+    if not os.path.exists(path):
+        raise BundleError(f"Model bundle {path} not found")
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise BundleError(f"{path} is too short to be a model bundle")
+        magic, header_length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not a model bundle")
+        try:
+            header = json.loads(f.read(header_length).decode('utf-8'))
+        except ValueError as e:
+            raise BundleError(f"{path} has a corrupt header: {e}")
+
+    if header.get('format_version') != FORMAT_VERSION:
+        raise BundleError(f"{path} has unsupported bundle format {header.get('format_version')}")
+    data_offset = _PREFIX.size + header_length
+    size = os.path.getsize(path)
+    for name, section in header['sections'].items():
+        if data_offset + section['offset'] + section['length'] > size:
+            raise BundleError(f"{path} is truncated (section {name})")
+    return header, data_offset
+
+
+class ModelBundle:
+    """A grade model bundle opened from disk
+
+    Opening reads only the header. The booster (engine 'xgboost', which imports
+    xgboost) or the compiled arrays (engine 'compiled', NumPy only) are read and
+    checksum-verified on the first prediction or an explicit load().
+    """
+
+    def __init__(self, path, engine='xgboost'):
+        self.path = path
+        self.engine = engine
+        self.header, self._data_offset = read_header(path)
+        if engine == 'compiled' and 'compiled' not in self.header['sections']:
+            raise BundleError(f"{path} has no compiled section; retrain to serve GRADE_ENGINE=compiled")
+        if engine not in ('xgboost', 'compiled'):
+            raise BundleError(f"Unknown engine {engine}")
+
+        self.version = self.header['model_version']
+        self.feature_names = self.header['feature_names']
+        self.grade_mapping = {int(k): v for k, v in self.header['grade_mapping'].items()}
+        self.mean = np.asarray(self.header['scaler']['mean'], dtype=np.float64)
+        self.scale = np.asarray(self.header['scaler']['scale'], dtype=np.float64)
+        self._predictor = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._predictor is not None
+
+    def _read_section(self, name):
+        section = self.header['sections'][name]
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset + section['offset'])
+            data = f.read(section['length'])
+        if hashlib.sha256(data).hexdigest() != section['sha256']:
+            raise BundleError(f"{self.path}: checksum mismatch in section {name}")
+        return data
+
+    def load(self):
+        """Load the model for the configured engine, once; safe to call from many threads"""
+        if self._predictor is not None:
+            return self._predictor
+        with self._lock:
+            if self._predictor is None:
+                start = time.perf_counter()
+                if self.engine == 'compiled':
+                    from grade_engine import CompiledTreeEnsemble
+                    compiled = CompiledTreeEnsemble.load(io.BytesIO(self._read_section('compiled')))
+                    # Scaler is folded into the tree thresholds
+                    self._predictor = compiled.predict_proba
+                else:
+                    import xgboost
+                    booster = xgboost.Booster()
+                    booster.load_model(bytearray(self._read_section('model')))
+                    self._predictor = lambda X: booster.inplace_predict((X - self.mean) / self.scale)
+                self.load_seconds = time.perf_counter() - start
+        return self._predictor
+
+    def predict_proba(self, features):
+        """Class probabilities for an (n, 9) matrix of raw features"""
+        return self.load()(np.asarray(features, dtype=np.float64))
+
+    def info(self):
+        return {
+            'path': self.path,
+            'engine': self.engine,
+            'model_version': self.version,
+            'created_at': self.header['created_at'],
+            'xgboost_version': self.header['xgboost_version'],
+            'boosting_rounds': self.header.get('boosting_rounds'),
+            'loaded': self.loaded,
+            'load_seconds': round(self.load_seconds, 4) if self.load_seconds is not None else None
+        }
+
+
+if __name__ == '__main__':
+    header, _ = read_header(sys.argv[1] if len(sys.argv) > 1 else BUNDLE_PATH)
+    print(json.dumps(header, indent=2))
@@ -0,0 +1,156 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from generate_dataset import import_pyarrow
+from model_bundle import BUNDLE_PATH, ModelBundle
+
+DEFAULT_CHUNK_SIZE = 100_000
+ID_COLUMN = 'Student_ID'
+
+# Bundle opened once per worker process (or once in this process when workers <= 1)
+_bundle = None
+
+def _open_bundle(path, engine):
+    global _bundle
+    _bundle = ModelBundle(path, engine)
+    _bundle.load()
+
+def is_parquet(path, file_format=None):
+    return (file_format or ('parquet' if path.endswith(('.parquet', '.pq')) else 'csv')) == 'parquet'
+
+def read_chunks(path, columns, chunk_size):
+    """Yield DataFrames of at most chunk_size rows with only the requested columns"""
+    if is_parquet(path):
+        _, pq = import_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        available = [c for c in columns if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=available):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in columns)
+
+def score_chunk(ids, X):
+    """Predicted grade, confidence and per-grade probabilities for one chunk, as a DataFrame"""
+    proba = _bundle.predict_proba(X)
+    best = proba.argmax(axis=1)
+    grades = np.array([_bundle.grade_mapping[i] for i in range(proba.shape[1])], dtype=object)
+
+    result = {}
+    if ids is not None:
+        result[ID_COLUMN] = ids
+    result['Predicted_Grade'] = grades[best]
+    result['Confidence'] = np.round(proba[np.arange(len(proba)), best] * 100, 2)
+    for i, grade in enumerate(grades):
+        result[f'P_{grade}'] = np.round(proba[:, i] * 100, 2)
+    return pd.DataFrame(result)
+
+def score_columns():
+    """Output columns after the optional Student_ID; written as a header-only file when no rows were scored"""
+    grades = [_bundle.grade_mapping[i] for i in range(len(_bundle.grade_mapping))]
+    return ['Predicted_Grade', 'Confidence'] + [f'P_{grade}' for grade in grades]
+
+def iter_scored(chunks, feature_names, workers):
+    """Score chunks in order, with at most 2 * workers chunks in flight"""
+    def split(chunk):
+        missing = [c for c in feature_names if c not in chunk.columns]
+        if missing:
+            raise KeyError(f"Input is missing columns: {missing}")
+        ids = chunk[ID_COLUMN].to_numpy() if ID_COLUMN in chunk.columns else None
+        return ids, chunk[feature_names].to_numpy(dtype=np.float64)
+
+    # A header-only CSV is read as one empty chunk: its columns are checked, nothing is scored
+    work = (split(chunk) for chunk in chunks)
+    work = ((ids, X) for ids, X in work if len(X))
+
+    if workers <= 1:
+        for ids, X in work:
+            yield score_chunk(ids, X)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_bundle,
+                             initargs=(_bundle.path, _bundle.engine)) as executor:
+        pending = deque()
+        for ids, X in work:
+            pending.append(executor.submit(score_chunk, ids, X))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def score_file(input_path, output_path, bundle_path=BUNDLE_PATH, engine='xgboost',
+               chunk_size=DEFAULT_CHUNK_SIZE, workers=1, file_format=None, progress=True):
+    """Stream input_path through the model into output_path (CSV or Parquet); returns rows scored"""
+    _open_bundle(bundle_path, engine)
+    feature_names = _bundle.feature_names
+    chunks = read_chunks(input_path, set(feature_names) | {ID_COLUMN}, chunk_size)
+
+    rows = 0
+    start = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    writer = None
+    try:
+        if is_parquet(output_path, file_format):
+            pa, pq = import_pyarrow()
+            for scored in iter_scored(chunks, feature_names, workers):
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                rows += len(scored)
+                if progress:
+                    print(f"  {rows:,} rows, {rows / (time.perf_counter() - start):,.0f} rows/s")
+            if writer is None:
+                columns = score_columns()
+                schema = pa.schema([(columns[0], pa.string())] + [(c, pa.float64()) for c in columns[1:]])
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.close()
+        else:
+            with open(tmp_path, 'w', newline='') as f:
+                for scored in iter_scored(chunks, feature_names, workers):
+                    scored.to_csv(f, header=rows == 0, index=False)
+                    rows += len(scored)
+                    if progress:
+                        print(f"  {rows:,} rows, {rows / (time.perf_counter() - start):,.0f} rows/s")
+                if rows == 0:
+                    pd.DataFrame(columns=score_columns()).to_csv(f, index=False)
+    except BaseException:
+        # Close before unlinking so the writer does not flush into a removed file
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, output_path)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a student CSV/Parquet export with the trained grade model")
+    parser.add_argument('input', help="file with the same feature columns as clean_student_dataset.csv")
+    parser.add_argument('--output', default='predictions.csv',
+                        help="output file; .parquet/.pq writes Parquet, anything else CSV")
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="override the format implied by --output")
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help="model bundle written by train_model.py")
+    parser.add_argument('--engine', choices=['xgboost', 'compiled'],
+                        default=os.environ.get('GRADE_ENGINE', 'xgboost').lower())
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows read and scored at a time")
+    parser.add_argument('--workers', type=int, default=1, help="processes scoring chunks in parallel")
+    parser.add_argument('--quiet', action='store_true', help="no per-chunk progress lines")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.bundle, args.engine, args.chunk_size,
+                      args.workers, args.format, progress=not args.quiet)
+    elapsed = time.perf_counter() - start
+
+    print(f"Predictions saved to '{args.output}'")
+    print(f"{rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from grade_engine import CompiledTreeEnsemble
+
+xgboost = pytest.importorskip('xgboost')
+
+
+def grade_like_data(rows, seed):
+    """Integer-valued marks like the real dataset, so many rows sit exactly on a split"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(4, 10, rows).round(2),  # GPA
+        rng.integers(0, 4, rows),           # backlogs
+        rng.integers(5, 21, rows),          # T1
+        rng.integers(5, 21, rows),          # T2
+        rng.integers(10, 36, rows),         # T3
+        rng.integers(40, 101, rows),        # attendance
+    ]).astype(np.float64)
+    score = X[:, 0] * 5 + X[:, 2] + X[:, 3] + X[:, 4] + X[:, 5] * 0.2 - X[:, 1] * 3
+    y = np.digitize(score, np.percentile(score, [15, 35, 60, 85]))
+    return X, y
+
+
+@pytest.mark.parametrize('scaled', [True, False])
+def test_compiled_model_matches_xgboost(scaled):
+    X, y = grade_like_data(3000, seed=0)
+    X_test, _ = grade_like_data(1000, seed=1)
+    X_test[::13, 5] = np.nan
+
+    scaler = StandardScaler().fit(X) if scaled else None
+    transform = scaler.transform if scaled else (lambda rows: rows)
+    model = xgboost.XGBClassifier(n_estimators=40, max_depth=5, learning_rate=0.3, tree_method='hist',
+                                  random_state=0)
+    model.fit(transform(X), y)
+
+    booster = model.get_booster()
+    compiled = CompiledTreeEnsemble.from_xgboost(model, scaler)
+
+    expected_margin = booster.inplace_predict(transform(X_test), predict_type='margin')
+    actual_margin = compiled.predict_margin(X_test)
+    assert expected_margin.dtype == actual_margin.dtype == np.float32
+    assert np.array_equal(expected_margin, actual_margin)
+    assert np.array_equal(model.predict(transform(X_test)), compiled.predict(X_test))
+
+    # Not bit-exact: XGBoost's softmax calls the C library's expf, which is not
+    # always correctly rounded, while predict_proba rounds exp correctly
+    expected = model.predict_proba(transform(X_test))
+    actual = compiled.predict_proba(X_test)
+    assert expected.dtype == actual.dtype == np.float32
+    np.testing.assert_array_max_ulp(expected, actual, maxulp=2)
@@ -1,4 +1,3 @@
-
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -7,80 +6,319 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 from xgboost import XGBClassifier
 import joblib
 import os
+import argparse
+import itertools
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from model_bundle import BUNDLE_PATH, write_bundle
+
+DATASET_PATH = 'clean_student_dataset.csv'
+
+# Define Final_Grade numeric mapping
+GRADE_MAPPING = {
+    'A+': 0, 'A': 1, 'B+': 2, 'B': 3,
+    'C+': 4, 'C': 5, 'D+': 6, 'D': 7, 'F': 8
+}
+
+# Boosting rounds are an upper bound; early stopping on the validation split picks the count
+DEFAULT_PARAMS = {
+    'n_estimators': 1000,
+    'learning_rate': 0.1,
+    'max_depth': 6,
+    'min_child_weight': 1,
+    'subsample': 1.0,
+    'colsample_bytree': 1.0,
+}
+
+# Largest probability difference allowed between the compiled model and XGBoost
+PROBABILITY_MAX_ULP = 2
+
+# Grid tried by --search; every combination is one trial
+SEARCH_GRID = {
+    'max_depth': [4, 6, 8],
+    'learning_rate': [0.1, 0.3],
+    'subsample': [0.8, 1.0],
+}
+
+def best_booster(xgb_model):
+    """The booster cut at the early-stopping round: the model predict_proba and the test metrics use
+
+    Training keeps boosting for early_stopping_rounds past the best round; those
+    trees are dropped. Models trained without early stopping are returned whole.
+    """
+    booster = xgb_model.get_booster()
+    best_iteration = getattr(xgb_model, 'best_iteration', None)
+    if best_iteration is None:
+        return booster
+    return booster[:best_iteration + 1]
+
+def compile_model(booster, scaler, X_check):
+    """Flatten the trained ensemble into NumPy arrays, with the scaler folded in
+
+    The compiled model is checked against the booster's own predictions on
+    X_check (raw, unscaled rows) and rejected unless every margin and predicted
+    class is identical. Probabilities may differ by up to PROBABILITY_MAX_ULP
+    float32 steps, because XGBoost's softmax uses the C library's expf.
+    """
+    from grade_engine import CompiledTreeEnsemble
+
+    compiled = CompiledTreeEnsemble.from_xgboost(booster, scaler)
+    X_check = np.asarray(X_check, dtype=np.float64)
+    # Scaled the way ModelBundle scales features for the xgboost engine
+    X_scaled = (X_check - scaler.mean_) / scaler.scale_
+    expected_margin = booster.inplace_predict(X_scaled, predict_type='margin')
+    expected = booster.inplace_predict(X_scaled)
+    actual = compiled.predict_proba(X_check)
 
-def train_and_save_model():
-    # Generate dataset first if it doesn't exist
-    if not os.path.exists('clean_student_dataset.csv'):
+    margin_diffs = int((expected_margin != compiled.predict_margin(X_check)).sum())
+    mismatched = int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum())
+    max_ulp = int(np.abs(expected.view(np.int32).astype(np.int64) - actual.view(np.int32)).max())
+    print(f"Compiled model check on {len(X_check)} rows: {margin_diffs} margin differences, "
+          f"{mismatched} class mismatches, max probability difference {max_ulp} ulp")
+    if margin_diffs or mismatched or max_ulp > PROBABILITY_MAX_ULP:
+        raise ValueError("Compiled model disagrees with XGBoost; not exporting")
+    return compiled
+
+def save_bundle(xgb_model, scaler, feature_names, grade_mapping, X_check, path=BUNDLE_PATH, metadata=None):
+    """Write the single model bundle the API serves, including the compiled arrays"""
+    # The bundle serves exactly the trees that were evaluated and compiled
+    booster = best_booster(xgb_model)
+    compiled = compile_model(booster, scaler, X_check)
+    header = write_bundle(path, booster, scaler, feature_names, grade_mapping, compiled, metadata)
+    print(f"Model bundle saved to {path} (version {header['model_version']})")
+    return header
+
+def bundle_from_pickles(path=BUNDLE_PATH):
+    """Build the bundle from the pickles written by earlier versions of this script"""
+    xgb_model = joblib.load('grade_prediction_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    feature_names = joblib.load('feature_names.pkl')
+    grade_mapping = joblib.load('grade_mapping.pkl')
+    df = load_dataset()
+    return save_bundle(xgb_model, scaler, feature_names, grade_mapping, df[feature_names].values, path,
+                       metadata={'source': 'pickles'})
+
+def load_dataset(path=DATASET_PATH):
+    """Read the CSV (or Parquet) dataset, generating the default one if it is missing"""
+    if not os.path.exists(path):
         print("Dataset not found. Generating dataset...")
-        from generate_dataset import generate_clean_student_dataset
-        clean_df = generate_clean_student_dataset(15000)
-        clean_df.to_csv('clean_student_dataset.csv', index=False)
+        from generate_dataset import write_dataset
+        write_dataset(path, 15000)
         print("Dataset generated!")
 
+    if path.endswith(('.parquet', '.pq')):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def split(X, y, test_size):
+    """Stratified split when every class has at least two rows, plain split otherwise"""
+    stratify = y if np.bincount(y)[np.unique(y)].min() >= 2 else None
+    return train_test_split(X, y, test_size=test_size, random_state=42, stratify=stratify)
+
+def make_model(params, n_jobs, early_stopping_rounds):
+    return XGBClassifier(
+        **params,
+        tree_method='hist',
+        n_jobs=n_jobs,
+        early_stopping_rounds=early_stopping_rounds,
+        random_state=42,
+        eval_metric='mlogloss'
+    )
+
+# Training data shared by search workers, loaded once per process from memory-mapped .npy files
+_shared = None
+
+def _load_shared(directory):
+    global _shared
+    _shared = tuple(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                    for name in ('X_train', 'y_train', 'X_val', 'y_val'))
+
+def run_trial(params, n_jobs, early_stopping_rounds):
+    """Fit one parameter set on the shared data; returns (params, report)"""
+    X_train, y_train, X_val, y_val = _shared
+    start = time.perf_counter()
+    model = make_model(params, n_jobs, early_stopping_rounds)
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    return params, {
+        'seconds': time.perf_counter() - start,
+        'best_iteration': int(model.best_iteration),
+        'val_mlogloss': float(model.best_score),
+        'val_accuracy': float(accuracy_score(y_val, model.predict(X_val))),
+    }
+
+def search_params(X_train, y_train, X_val, y_val, base_params, n_jobs, early_stopping_rounds,
+                  workers=2, time_budget=None):
+    """Try every SEARCH_GRID combination in parallel; returns the best parameters by validation log loss
+
+    The preprocessed arrays are written once to .npy files that every worker
+    memory-maps, instead of being pickled into each task. No new trials are
+    started once time_budget seconds have passed, but the first one always runs.
+    """
+    trials = [dict(base_params, **dict(zip(SEARCH_GRID, values)))
+              for values in itertools.product(*SEARCH_GRID.values())]
+    threads_per_trial = max(1, n_jobs // workers)
+    print(f"\nSearching {len(trials)} parameter sets with {workers} workers x {threads_per_trial} threads")
+
+    start = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory() as shared_dir:
+        for name, array in (('X_train', X_train), ('y_train', y_train), ('X_val', X_val), ('y_val', y_val)):
+            np.save(os.path.join(shared_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_shared, initargs=(shared_dir,)) as executor:
+            pending = set()
+            queued = iter(trials)
+            while True:
+                # Keep one trial per worker running until the grid or the time budget runs out
+                while len(pending) < workers and (time_budget is None or not (results or pending) or
+                                                  time.perf_counter() - start < time_budget):
+                    params = next(queued, None)
+                    if params is None:
+                        break
+                    pending.add(executor.submit(run_trial, params, threads_per_trial, early_stopping_rounds))
+                if not pending:
+                    break
+                done = next(as_completed(pending))
+                pending.remove(done)
+                params, report = done.result()
+                results.append((params, report))
+                print(f"  {', '.join(f'{k}={params[k]}' for k in SEARCH_GRID)}: "
+                      f"val mlogloss {report['val_mlogloss']:.4f}, accuracy {report['val_accuracy']:.4f}, "
+                      f"{report['best_iteration'] + 1} rounds, {report['seconds']:.1f}s")
+
+    skipped = len(trials) - len(results)
+    if skipped:
+        print(f"  Time budget reached; {skipped} parameter sets not tried")
+    best_params, best_report = min(results, key=lambda result: result[1]['val_mlogloss'])
+    print(f"Best: {', '.join(f'{k}={best_params[k]}' for k in SEARCH_GRID)} "
+          f"(val mlogloss {best_report['val_mlogloss']:.4f}) after {time.perf_counter() - start:.1f}s")
+    return best_params
+
+def train_and_save_model(dataset_path=DATASET_PATH, params=None, n_jobs=None, early_stopping_rounds=30,
+                         validation_size=0.1, search=False, search_workers=2, time_budget=None,
+                         bundle_path=BUNDLE_PATH):
+    """Train, evaluate and save the grade model
+
+    Uses histogram tree building with early stopping on a validation split
+    carved out of the training data; with search=True the parameters are first
+    picked by a parallel grid search over SEARCH_GRID.
+    """
+    timings = {}
+    started = time.perf_counter()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+
     # Load the clean dataset
-    df = pd.read_csv('clean_student_dataset.csv')
+    df = load_dataset(dataset_path)
     print(f"Loaded dataset with shape: {df.shape}")
 
-    # Define Final_Grade numeric mapping
-    grade_mapping = {
-        'A+': 0, 'A': 1, 'B+': 2, 'B': 3,
-        'C+': 4, 'C': 5, 'D+': 6, 'D': 7, 'F': 8
-    }
+    grade_mapping = GRADE_MAPPING
     df['Grade_Label'] = df['Final_Grade'].map(grade_mapping)
 
     # Prepare features and target
     X = df.drop(['Student_ID', 'Final_Grade', 'Grade_Label', 'Total_Score'], axis=1)
-    y = df['Grade_Label']
+    y = df['Grade_Label'].values
+    feature_names = list(X.columns)
 
-    print(f"Features: {list(X.columns)}")
+    print(f"Features: {feature_names}")
     print(f"Target distribution:\n{df['Final_Grade'].value_counts()}")
 
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    # Train / validation / test split
+    X_train, X_test, y_train, y_test = split(X.values, y, 0.2)
+    X_train, X_val, y_train, y_val = split(X_train, y_train, validation_size)
 
-    # Feature scaling
+    # Feature scaling, fitted once and shared by every trial
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    X_train_scaled = scaler.fit_transform(pd.DataFrame(X_train, columns=feature_names))
+    X_val_scaled = scaler.transform(pd.DataFrame(X_val, columns=feature_names))
+    X_test_scaled = scaler.transform(pd.DataFrame(X_test, columns=feature_names))
+    timings['load_and_preprocess'] = time.perf_counter() - started
 
-    # Train XGBoost model
-    xgb_model = XGBClassifier(
-        n_estimators=300,
-        use_label_encoder=False,
-        random_state=42,
-        eval_metric='mlogloss'
-    )
+    if search:
+        start = time.perf_counter()
+        params = search_params(X_train_scaled, y_train, X_val_scaled, y_val, params, n_jobs,
+                               early_stopping_rounds, search_workers, time_budget)
+        timings['search'] = time.perf_counter() - start
 
-    print("Training XGBoost model...")
-    xgb_model.fit(X_train_scaled, y_train)
+    # Train XGBoost model
+    print(f"\nTraining XGBoost model ({n_jobs} threads): {params}")
+    start = time.perf_counter()
+    xgb_model = make_model(params, n_jobs, early_stopping_rounds)
+    xgb_model.fit(X_train_scaled, y_train, eval_set=[(X_val_scaled, y_val)], verbose=False)
+    timings['train'] = time.perf_counter() - start
 
     # Evaluate model
+    start = time.perf_counter()
     y_pred = xgb_model.predict(X_test_scaled)
+    timings['predict_test'] = time.perf_counter() - start
     accuracy = accuracy_score(y_test, y_pred)
     precision = precision_score(y_test, y_pred, average='macro', zero_division=0)
     recall = recall_score(y_test, y_pred, average='macro', zero_division=0)
     f1 = f1_score(y_test, y_pred, average='macro', zero_division=0)
 
-    print(f"\nModel Performance:")
+    # Save model, scaler statistics, feature names and grade mapping as one bundle,
+    # with an array-based copy for serving without xgboost (GRADE_ENGINE=compiled)
+    start = time.perf_counter()
+    reverse_grade_mapping = {v: k for k, v in grade_mapping.items()}
+    save_bundle(xgb_model, scaler, feature_names, reverse_grade_mapping, X_test, bundle_path, metadata={
+        'params': params,
+        'boosting_rounds': int(xgb_model.best_iteration) + 1,
+        'test_accuracy': round(float(accuracy), 4),
+        'train_rows': len(y_train)
+    })
+    timings['save'] = time.perf_counter() - start
+    timings['total'] = time.perf_counter() - started
+
+    print(f"\nModel Performance ({len(y_test)} test rows):")
     print(f"Accuracy: {accuracy:.4f}")
     print(f"Precision: {precision:.4f}")
     print(f"Recall: {recall:.4f}")
     print(f"F1-score: {f1:.4f}")
+    print(f"Boosting rounds: {xgb_model.best_iteration + 1} of {params['n_estimators']} (early stopping)")
 
-    # Save model and scaler
-    joblib.dump(xgb_model, 'grade_prediction_model.pkl')
-    joblib.dump(scaler, 'scaler.pkl')
-    
-    # Save feature names for later use
-    feature_names = list(X.columns)
-    joblib.dump(feature_names, 'feature_names.pkl')
-    
-    # Save grade mapping
-    reverse_grade_mapping = {v: k for k, v in grade_mapping.items()}
-    joblib.dump(reverse_grade_mapping, 'grade_mapping.pkl')
+    print("\nTiming report:")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<20} {seconds:8.2f}s")
 
-    print("\nModel, scaler, and metadata saved successfully!")
+    print("\nModel bundle saved successfully!")
     return xgb_model, scaler, feature_names, reverse_grade_mapping
 
+def main():
+    parser = argparse.ArgumentParser(description="Train the grade prediction model")
+    parser.add_argument('--data', default=DATASET_PATH, help="training data (.csv or .parquet)")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1, help="XGBoost threads")
+    parser.add_argument('--n-estimators', type=int, default=DEFAULT_PARAMS['n_estimators'],
+                        help="maximum boosting rounds")
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_PARAMS['learning_rate'])
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_PARAMS['max_depth'])
+    parser.add_argument('--early-stopping-rounds', type=int, default=30)
+    parser.add_argument('--validation-size', type=float, default=0.1,
+                        help="share of the training rows held out for early stopping")
+    parser.add_argument('--search', action='store_true', help="grid-search parameters before the final fit")
+    parser.add_argument('--search-workers', type=int, default=2)
+    parser.add_argument('--time-budget', type=float, help="seconds after which no new search trials start")
+    parser.add_argument('--output', default=BUNDLE_PATH, help="model bundle to write")
+    parser.add_argument('--from-pickles', action='store_true',
+                        help="only convert the saved .pkl model files into a bundle")
+    args = parser.parse_args()
+
+    if args.from_pickles:
+        bundle_from_pickles(args.output)
+        return
+
+    train_and_save_model(
+        dataset_path=args.data,
+        params={'n_estimators': args.n_estimators, 'learning_rate': args.learning_rate,
+                'max_depth': args.max_depth},
+        n_jobs=args.threads,
+        early_stopping_rounds=args.early_stopping_rounds,
+        validation_size=args.validation_size,
+        search=args.search,
+        search_workers=args.search_workers,
+        time_budget=args.time_budget,
+        bundle_path=args.output)
+
 if __name__ == "__main__":
-    train_and_save_model()
+    main()
@@ -100,19 +100,33 @@ recognitionInterval.current = setInterval(async () => {
       const imageBase64 = canvas.toDataURL('image/jpeg');
 
       try {
-        const response = await fetch('http://localhost:5000/api/recognize', {
+        const response = await fetch('http://localhost:5001/api/recognize_multiple', {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({ image: imageBase64 }),
         });
 
-        const result = await response.json();
+        const data = await response.json();
 
-        if (!Array.isArray(result)) {
-          console.error("Unexpected response format:", result);
+        // 400 with an error when no face is in frame or the model is not trained yet
+        if (!data.success || !Array.isArray(data.faces)) {
+          if (data.error !== 'No faces detected') {
+            console.error("Recognition failed:", data.error ?? data);
+          }
           return;
         }
 
+        const result: AttendanceRecord[] = data.faces
+          .filter((face: { rollNo: string | null }) => face.rollNo)
+          .map((face: { name: string; rollNo: string; confidence: number }) => ({
+            id: face.rollNo,
+            name: face.name,
+            rollNo: face.rollNo,
+            status: 'present' as const,
+            confidence: Math.round(face.confidence * 10000) / 100,
+            timestamp: data.timestamp,
+          }));
+
         setAttendanceData((prev) => {
           const newEntries = result.filter(
             (student) => !prev.some((s) => s.id === student.id)
@@ -169,7 +183,7 @@ recognitionInterval.current = setInterval(async () => {
       description: `Attendance session completed. ${attendanceData.length} students marked present.`,
     });
     if (attendanceData.length > 0) {
-  fetch('http://localhost:5000/api/save-attendance', {
+  fetch('http://localhost:5001/api/save-attendance', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({